@@ -14,7 +14,11 @@ Usage:
 
 Licensed under Apache 2.0
 """
-from .detector import Detector  # noqa: F401
+from .bounded import BoundedDetection, BoundedProbe  # noqa: F401
+from .detector import Detector, Segment  # noqa: F401
 from .encoding import Encoding  # noqa: F401
+from .model import Model  # noqa: F401
+from .preloading import preload  # noqa: F401
+from .scoring import Scoring  # noqa: F401
 
 __version__ = '1.0.0'
@@ -0,0 +1,123 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from charamel.encoding import Encoding
+from charamel.features import Buffer, _count_features, _get_features, _to_view
+from charamel.model import Model
+from charamel.scoring import ScoreAccumulator, Scoring
+from charamel.validity import exclude_invalid
+
+
+class Budget(NamedTuple):
+    """
+    Limits on the cost of detection
+    """
+
+    max_bytes: Optional[int] = None  # Maximum number of leading bytes to process
+    timeout: Optional[float] = None  # Maximum time in seconds to spend
+    chunk_size: int = 65536  # Number of bytes processed between timeout checks
+
+
+class BoundedDetection(NamedTuple):
+    """
+    Encoding detected within a budget
+    """
+
+    encoding: Optional[Encoding]
+    partial: bool  # Budget ran out before the whole content was processed
+    processed: int  # Number of leading bytes of content that were processed
+
+
+class BoundedProbe(NamedTuple):
+    """
+    Encodings with confidences probed within a budget
+    """
+
+    encodings: List[Tuple[Encoding, float]]
+    partial: bool  # Budget ran out before the whole content was processed
+    processed: int  # Number of leading bytes of content that were processed
+
+
+def _add_chunk(
+    accumulator: ScoreAccumulator, scoring: Scoring, chunk: memoryview, overlaps: bool
+) -> Iterable[int]:
+    """
+    Add features of chunk to scores, the first byte of an overlapping chunk
+    was already counted with the previous chunk
+    """
+    if scoring is Scoring.FREQUENCY:
+        counts = _count_features(chunk)
+        if overlaps:
+            counts[chunk[0]] -= 1
+        for feature, count in counts.items():
+            accumulator.add(feature, count)
+        return counts
+
+    features = _get_features(chunk)
+    for feature in features:
+        accumulator.add(feature)
+    return features
+
+
+def _check_budget(budget: Budget) -> None:
+    """
+    Check that budget limits are valid
+    """
+    if budget.max_bytes is not None and budget.max_bytes < 0:
+        raise ValueError('max_bytes must be non-negative')
+
+    if budget.timeout is not None and budget.timeout < 0:
+        raise ValueError('timeout must be non-negative')
+
+    if budget.chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+
+
+def score_within(
+    model: Model, content: Buffer, budget: Budget, prefilter: bool = False
+) -> Tuple[Dict[Encoding, float], bool, int]:
+    """
+    Compute encoding scores of content prefix, that is processed in chunks
+    until either the whole content is processed or the budget runs out;
+    the first chunk is processed regardless of the timeout
+
+    Args:
+        model: Linear model
+        content: Encoded text, any object supporting buffer protocol
+        budget: Limits on the number of processed bytes and time spent
+        prefilter: Whether to omit encodings that are unable to decode
+            the processed bytes
+
+    Returns:
+        Real-valued score for each encoding, whether content was processed
+        partially and number of processed bytes
+    """
+    _check_budget(budget)
+    deadline = None if budget.timeout is None else time.perf_counter() + budget.timeout
+    accumulator = model.accumulator()
+    view = _to_view(content)
+    size = len(view) if budget.max_bytes is None else min(len(view), budget.max_bytes)
+    seen: Set[int] = set()
+    processed = 0
+    while processed < size:
+        if processed and deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        # Chunks overlap by a byte, so that bi-grams across chunks are counted
+        end = min(processed + budget.chunk_size, size)
+        chunk = view[max(processed - 1, 0) : end]
+        features = _add_chunk(accumulator, model.scoring, chunk, processed > 0)
+        if prefilter:
+            seen.update(features)
+        processed = end
+
+    scores = accumulator.scores
+    if prefilter:
+        scores = exclude_invalid(scores, seen)
+    return scores, processed < len(view), processed
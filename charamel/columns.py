@@ -0,0 +1,191 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import concurrent.futures
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from charamel.detector import Detector
+from charamel.encoding import Encoding
+from charamel.features import _to_view
+from charamel.records import _iter_batches
+from charamel.serialization import _cast
+
+Label = Tuple[Optional[Encoding], Optional[float]]
+
+_DETECTOR: Optional[Detector] = None  # Detector shared with worker process
+
+
+class ColumnEncodings(NamedTuple):
+    """
+    Encodings of binary column cells, `None` for null cells
+    """
+
+    encodings: List[Optional[Encoding]]
+    confidences: List[Optional[float]]
+
+
+def _is_arrow(column: Any) -> bool:
+    """
+    Check if column is Arrow array, without importing `pyarrow`:
+    if it is not imported yet, there can be no Arrow arrays
+    """
+    pyarrow = sys.modules.get('pyarrow')
+    return pyarrow is not None and isinstance(
+        column, (pyarrow.Array, pyarrow.ChunkedArray)
+    )
+
+
+def _iter_arrow_cells(array: Any) -> Iterator[Optional[memoryview]]:
+    """
+    Iterate over cells of Arrow binary array as views of its data buffer
+
+    Args:
+        array: Arrow `BinaryArray` or `LargeBinaryArray`
+
+    Returns:
+        Iterator over cell contents, `None` for null cells
+    """
+    import pyarrow  # pylint: disable=import-outside-toplevel
+
+    if pyarrow.types.is_binary(array.type):
+        typecode, width = 'i', 4
+    elif pyarrow.types.is_large_binary(array.type):
+        typecode, width = 'q', 8
+    else:
+        raise ValueError(f'Column must be binary, got {array.type}')
+
+    size = len(array)
+    if not size:
+        return
+
+    validity, offsets, data = array.buffers()
+    start = array.offset
+    offsets = memoryview(offsets)[start * width : (start + size + 1) * width]
+    offsets = _cast(offsets.cast('B'), typecode)
+    data = _to_view(data if data is not None else b'')
+    bitmap = _to_view(validity) if validity is not None and array.null_count else None
+    for index in range(size):
+        position = start + index
+        if bitmap is not None and not bitmap[position >> 3] >> (position & 7) & 1:
+            yield None
+        else:
+            yield data[offsets[index] : offsets[index + 1]]
+
+
+def _iter_chunks(column: Any, chunk_size: int) -> Iterator[Any]:
+    """
+    Split column into chunks, Arrow row groups are kept as they are
+    and split further only if they are larger than `chunk_size`
+    """
+    if not _is_arrow(column):
+        yield from _iter_batches(column, chunk_size)
+        return
+
+    for chunk in getattr(column, 'chunks', [column]):
+        for start in range(0, len(chunk), chunk_size):
+            yield chunk.slice(start, chunk_size)
+
+
+def _detect_chunk(detector: Detector, chunk: Any) -> List[Label]:
+    """
+    Detect encodings of column chunk, scoring each distinct cell only once
+
+    Args:
+        detector: Encoding detector
+        chunk: Chunk of Arrow array or list of cells
+
+    Returns:
+        Encoding (or `None` if not confident enough) and confidence of each cell
+    """
+    # pylint: disable=protected-access
+    cells: Iterable[Any] = _iter_arrow_cells(chunk) if _is_arrow(chunk) else chunk
+    labels: Dict[Any, Label] = {}
+    result: List[Label] = []
+    for cell in cells:
+        if not isinstance(cell, (bytes, bytearray, memoryview)):
+            result.append((None, None))
+            continue
+
+        try:
+            label = labels.get(cell)
+        except (TypeError, ValueError):  # Writable buffers are not hashable
+            result.append(detector._label(detector._score(cell)))
+            continue
+
+        if label is None:
+            label = labels[cell] = detector._label(detector._score(cell))
+        result.append(label)
+    return result
+
+
+def _initialize(detector: Detector) -> None:
+    """
+    Share detector with worker process
+    """
+    global _DETECTOR  # pylint: disable=global-statement
+    _DETECTOR = detector
+
+
+def _detect_shared(chunk: Any) -> List[Label]:
+    """
+    Detect encodings of column chunk with detector shared with worker process
+    """
+    if _DETECTOR is None:
+        raise RuntimeError('Detector is not shared with worker process')
+    return _detect_chunk(_DETECTOR, chunk)
+
+
+def detect_column(
+    detector: Detector,
+    column: Any,
+    chunk_size: int = 65536,
+    workers: Optional[int] = 1,
+) -> ColumnEncodings:
+    """
+    Detect encoding of each cell of binary column
+
+    Cells of Arrow arrays are scored in place, as views of their data buffers,
+    without materializing them as `bytes`. Chunked arrays, e.g. Parquet columns,
+    are split by row groups, that are detected in parallel if `workers` is not 1
+
+    Args:
+        detector: Encoding detector
+        column: Arrow `BinaryArray`, `LargeBinaryArray` or `ChunkedArray` of them,
+            or any iterable of cells, e.g. pandas Series of bytes; cells that are
+            not bytes-like objects, like `None` or `NaN`, are treated as nulls
+        chunk_size: Maximum number of cells detected at a time
+        workers: Number of processes, `None` for number of CPUs, 1 disables
+            multiprocessing
+
+    Returns:
+        Encoding (or `None` if not confident enough) and confidence of each cell
+
+    Example:
+        >>> table = pyarrow.parquet.read_table('data.parquet')
+        >>> result = detect_column(Detector(), table['payload'], workers=None)
+        >>> result.encodings[:2]
+        [<Encoding.UTF_8: 'utf_8'>, None]
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+
+    # Detector is sent to each worker once, not with every chunk, as models
+    # without a source are embedded into serialized detectors
+    tasks = _iter_chunks(column, chunk_size)
+    if workers == 1:
+        chunks = [_detect_chunk(detector, chunk) for chunk in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_initialize, initargs=(detector,)
+        ) as executor:
+            chunks = list(executor.map(_detect_shared, tasks))
+
+    labels = [label for chunk in chunks for label in chunk]
+    return ColumnEncodings(
+        encodings=[encoding for encoding, _ in labels],
+        confidences=[confidence for _, confidence in labels],
+    )
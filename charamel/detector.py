@@ -4,33 +4,96 @@
 
 Licensed under Apache 2.0
 """
-import itertools
+import heapq
+import json
 import math
-from typing import Dict, List, Optional, Sequence, Set, Tuple
+import operator
+import pathlib
+import struct
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 
+from charamel.bounded import BoundedDetection, BoundedProbe, Budget, score_within
 from charamel.encoding import Encoding
-from charamel.resources import load_biases, load_features, load_weights
+from charamel.features import Buffer, _get_feature_counts, _get_features, _to_view
+from charamel.model import Model
+from charamel.resources import RESOURCE_DIRECTORY, stat_resources
+from charamel.scoring import Scoring
+from charamel.validity import exclude_invalid
 
+_HEADER_SIZE = struct.Struct('<I')
 
-def _get_features(content: bytes) -> Set[int]:
+
+class Segment(NamedTuple):
+    """
+    Region of content that is encoded with a single encoding
+    """
+
+    start: int
+    end: int
+    encoding: Optional[Encoding]
+    confidence: float
+
+
+def _apply_sigmoid(value: float) -> float:
     """
-    Extract unique byte uni-grams and bi-grams
+    Apply sigmoid function to given value
+    """
+    return 1 / (1 + math.exp(-value))
+
+
+def _validate_min_confidence(min_confidence: float) -> float:
+    """
+    Check that minimum confidence threshold is a valid probability
+    """
+    if not 0.0 <= min_confidence <= 1.0:
+        raise ValueError('min_confidence must be in range [0, 1]')
+    return min_confidence
+
+
+_ModelKey = Tuple[Optional[str], Tuple[Encoding, ...]]  # Source and encodings
+
+_MODELS_LOCK = threading.Lock()
+_MODELS: Dict[_ModelKey, Tuple[object, Model]] = {}  # With opened file or file stamps
+
+
+def _get_model(source: Optional[str], encodings: Tuple[Encoding, ...]) -> Model:
+    """
+    Get model for given encodings from shared source, cached for each process
+
+    Models from a model file are cached until the file is replaced, see `Model.open`,
+    and models from a resource directory until any of its files is rewritten
 
     Args:
-        content: Encoded text
+        source: Model resource directory or model file, `None` for bundled model
+        encodings: Encodings supported by model
 
     Returns:
-        Set of integers that represent byte n-grams
+        Linear model
     """
-    pairs = zip(content, itertools.islice(content, 1, None))
-    return set(content).union(x * 256 + y for x, y in pairs)
+    path = None if source is None else pathlib.Path(source)
+    mapped = None if path is None or path.is_dir() else Model.open(path)
+    stamp = stat_resources(path) if path is not None and mapped is None else mapped
+    with _MODELS_LOCK:
+        cached = _MODELS.get((source, encodings))
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
 
+        if mapped is not None:
+            model = mapped.select(encodings)
+        elif path is None:
+            model = Model.load(encodings)
+        else:
+            model = Model.load(encodings, directory=path)
+        _MODELS[source, encodings] = stamp, model
+        return model
 
-def _apply_sigmoid(value: float) -> float:
+
+def _restore_detector(data: Buffer) -> 'Detector':
     """
-    Apply sigmoid function to given value
+    Restore pickled detector
     """
-    return 1 / (1 + math.exp(-value))
+    return Detector.from_bytes(data)
 
 
 class Detector:
@@ -42,14 +105,21 @@ class Detector:
         self,
         encodings: Sequence[Encoding] = tuple(Encoding),
         min_confidence: float = 0.0,
+        prefilter: bool = False,
     ):
         """
         Create universal encoding detector for given encodings
 
+        The bundled model is loaded once per process for each set of encodings,
+        prefork servers load it before fork with `charamel.preload`
+
         Args:
             encodings: Encodings that will be supported by this Detector instance,
                 less encodings lead to faster runtime
             min_confidence: Minimum confidence threshold for encodings
+            prefilter: Whether to rule out encodings that are unable to decode
+                content, e.g. ASCII for content with bytes above 0x7F, see
+                `charamel.validity`
 
         Example:
             >>> detector = Detector(
@@ -60,37 +130,193 @@ class Detector:
         if not encodings:
             raise ValueError('No encodings specified')
 
-        if not 0.0 <= min_confidence <= 1.0:
-            raise ValueError('min_confidence must be in range [0, 1]')
+        self._min_confidence = _validate_min_confidence(min_confidence)
+        self._prefilter = prefilter
+        self._model = _get_model(None, tuple(encodings))
+
+    @classmethod
+    def from_model(
+        cls, model: Model, min_confidence: float = 0.0, prefilter: bool = False
+    ) -> 'Detector':
+        """
+        Create encoding detector that uses given model, e.g. a compiled one
+
+        Args:
+            model: Linear model, detector supports the same encodings as model
+            min_confidence: Minimum confidence threshold for encodings
+            prefilter: Whether to rule out encodings that are unable to decode content
+
+        Example:
+            >>> model = Model.load().compile([Encoding.UTF_8, Encoding.BIG_5])
+            >>> detector = Detector.from_model(model, min_confidence=0.7)
+        """
+        detector = cls.__new__(cls)
+        detector._min_confidence = _validate_min_confidence(min_confidence)
+        detector._prefilter = prefilter
+        detector._model = model
+        return detector
+
+    @property
+    def encodings(self) -> List[Encoding]:
+        """
+        Encodings supported by this Detector instance
+        """
+        return self._model.encodings
+
+    def swap_model(self, model: Model) -> Model:
+        """
+        Replace detector model by reference, e.g. with retrained weights
+
+        Calls that are in progress keep using the previous model,
+        as each call reads the model reference only once
+
+        Args:
+            model: Linear model, detector will support the same encodings as model
+
+        Returns:
+            Previous model
+        """
+        previous = self._model
+        self._model = model
+        return previous
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize detector, e.g. to send it to worker processes
 
-        self._features = load_features()
-        self._weights = load_weights(encodings)
-        self._biases = load_biases(encodings)
-        self._min_confidence = min_confidence
+        Models that were loaded from resource directories or opened from model files
+        are serialized as references, so only encodings and confidence
+        threshold are stored. Other models are embedded into serialized detector
 
-    def _score(self, content: bytes) -> Dict[Encoding, float]:
+        Returns:
+            Binary detector representation
+        """
+        model = self._model
+        bundled = model.source == RESOURCE_DIRECTORY
+        header = {
+            'encodings': [encoding.value for encoding in model.encodings],
+            'min_confidence': self._min_confidence,
+            'prefilter': self._prefilter,
+            'bundled': bundled,
+            'source': None if bundled or model.source is None else str(model.source),
+        }
+        blob = b'' if model.source is not None else model.to_bytes()
+        encoded = json.dumps(header).encode()
+        return _HEADER_SIZE.pack(len(encoded)) + encoded + blob
+
+    @classmethod
+    def from_bytes(cls, data: Buffer) -> 'Detector':
+        """
+        Deserialize detector created by `Detector.to_bytes`
+
+        Referenced models are cached for each process, so deserializing another
+        detector that shares the model is almost free
+
+        Args:
+            data: Binary detector representation
+
+        Returns:
+            Deserialized detector
+        """
+        view = memoryview(data).cast('B')
+        (size,) = _HEADER_SIZE.unpack_from(view)
+        offset = _HEADER_SIZE.size + size
+        header = json.loads(view[_HEADER_SIZE.size : offset].tobytes())
+        if header['bundled'] or header['source'] is not None:
+            encodings = tuple(Encoding(encoding) for encoding in header['encodings'])
+            model = _get_model(header['source'], encodings)
+        else:
+            model = Model.from_bytes(view[offset:])
+        return cls.from_model(
+            model,
+            min_confidence=header['min_confidence'],
+            prefilter=header.get('prefilter', False),
+        )
+
+    def __reduce__(self):
+        return _restore_detector, (self.to_bytes(),)
+
+    def _score(self, content: Buffer) -> Dict[Encoding, float]:
         """
         Compute how likely each encoding is able to decode the content
 
         Args:
-            content: Encoded text
+            content: Encoded text, any object supporting buffer protocol
+
+        Returns:
+            Real-valued score for each encoding, encodings that are unable
+            to decode the content are omitted if prefilter is enabled
+        """
+        model = self._model
+        features: Iterable[int]
+        if model.scoring is Scoring.FREQUENCY:
+            features = counts = _get_feature_counts(content)
+            scores = model.score_frequencies(counts)
+        else:
+            features = _get_features(content)
+            scores = model.score(features)
+        return exclude_invalid(scores, features) if self._prefilter else scores
+
+    def _choose(self, scores: Dict[Encoding, float]) -> Optional[Encoding]:
+        """
+        Choose the best scoring encoding if it is confident enough
+
+        Args:
+            scores: Real-valued score for each encoding
+
+        Returns:
+            Encoding or `None` if not confident enough
+        """
+        if scores:
+            encoding = max(scores, key=scores.__getitem__)
+            if _apply_sigmoid(scores[encoding]) >= self._min_confidence:
+                return encoding
+        return None
+
+    def _label(self, scores: Dict[Encoding, float]) -> Tuple[Optional[Encoding], float]:
+        """
+        Label content with the best scoring encoding and its confidence
+
+        Args:
+            scores: Real-valued score for each encoding
 
         Returns:
-            Real-valued score for each encoding
+            Encoding (or `None` if not confident enough) and its confidence
+        """
+        encoding = max(scores, key=scores.__getitem__)
+        confidence = _apply_sigmoid(scores[encoding])
+        if confidence < self._min_confidence:
+            return None, confidence
+        return encoding, confidence
+
+    def _rank(
+        self, scores: Dict[Encoding, float], top: int
+    ) -> List[Tuple[Encoding, float]]:
         """
-        scores = self._biases.copy()
-        features = _get_features(content).intersection(self._features)
-        indices = [self._features[feature] for feature in features]
-        for encoding, weights in self._weights.items():
-            scores[encoding] += sum(weights[index] for index in indices)
-        return scores
+        Select `top` best scoring encodings without sorting all of the scores,
+        confidences are computed only for selected encodings
 
-    def detect(self, content: bytes) -> Optional[Encoding]:
+        Args:
+            scores: Real-valued score for each encoding
+            top: How many of the most likely encodings to return
+
+        Returns:
+            Confident encodings with confidences, the most likely first
+        """
+        best = heapq.nlargest(top, scores.items(), key=operator.itemgetter(1))
+        confidences = [(encoding, _apply_sigmoid(score)) for encoding, score in best]
+        return [
+            (encoding, confidence)
+            for encoding, confidence in confidences
+            if confidence >= self._min_confidence
+        ]
+
+    def detect(self, content: Buffer) -> Optional[Encoding]:
         """
         Detect the most probable encoding for given byte content
 
         Args:
-            content: Encoded text
+            content: Encoded text, any object supporting buffer protocol
 
         Returns:
             Encoding or `None` if not confident enough
@@ -100,19 +326,14 @@ class Detector:
             >>> detector.detect(b'\xc4\xe3\xba\xc3')
             <Encoding.GB_K: 'gbk'>
         """
-        scores = self._score(content)
-        if scores:
-            encoding, score = max(scores.items(), key=lambda x: x[1])
-            if _apply_sigmoid(score) >= self._min_confidence:
-                return encoding
-        return None
+        return self._choose(self._score(content))
 
-    def probe(self, content: bytes, top: int = 3) -> List[Tuple[Encoding, float]]:
+    def probe(self, content: Buffer, top: int = 3) -> List[Tuple[Encoding, float]]:
         """
         Detect `top` probable encodings with confidences
 
         Args:
-            content: Encoded text
+            content: Encoded text, any object supporting buffer protocol
             top: How many of the most likely encodings to return
 
         Example:
@@ -122,12 +343,153 @@ class Detector:
              (<Encoding.GB_18030: 'gb18030'>, 0.6886364021582343),
              (<Encoding.GB_2312: 'gb2312'>, 0.6707061223726806)]
         """
-        scores = sorted(self._score(content).items(), key=lambda x: x[1], reverse=True)
-        confidences = [
-            (encoding, _apply_sigmoid(score)) for encoding, score in scores[:top]
-        ]
+        return self._rank(self._score(content), top)
+
+    def detect_batch(self, contents: Iterable[Buffer]) -> List[Optional[Encoding]]:
+        """
+        Detect the most probable encoding for each of the given byte contents
+
+        Args:
+            contents: Encoded texts, any objects supporting buffer protocol
+
+        Returns:
+            Encoding or `None` if not confident enough, for each content
+
+        Example:
+            >>> detector = Detector()
+            >>> detector.detect_batch([b'\xc4\xe3\xba\xc3', b'hello'])
+            [<Encoding.GB_K: 'gbk'>, <Encoding.ASCII: 'ascii'>]
+        """
+        return [self._choose(self._score(content)) for content in contents]
+
+    def probe_batch(
+        self, contents: Iterable[Buffer], top: int = 3
+    ) -> List[List[Tuple[Encoding, float]]]:
+        """
+        Detect `top` probable encodings with confidences for each of the given contents
+
+        Args:
+            contents: Encoded texts, any objects supporting buffer protocol
+            top: How many of the most likely encodings to return for each content
+
+        Returns:
+            Confident encodings with confidences, the most likely first,
+            for each content
+        """
+        return [self._rank(self._score(content), top) for content in contents]
+
+    def detect_within(
+        self,
+        content: Buffer,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+        chunk_size: int = 65536,
+    ) -> BoundedDetection:
+        """
+        Detect the most probable encoding, processing content in chunks
+        until it is exhausted or the byte or time budget runs out, so that
+        the cost of detection is bounded regardless of content size
+
+        Args:
+            content: Encoded text, any object supporting buffer protocol
+            max_bytes: Maximum number of leading bytes to process, `None` for no limit
+            timeout: Maximum time in seconds to spend, `None` for no limit;
+                the first chunk is processed regardless of the timeout
+            chunk_size: Number of bytes processed between timeout checks
+
+        Returns:
+            Encoding (or `None` if not confident enough) detected from
+            the processed bytes, and whether content was processed partially
+
+        Example:
+            >>> detector.detect_within(content, max_bytes=4096, timeout=0.005)
+            BoundedDetection(encoding=<Encoding.UTF_8: 'utf_8'>, partial=True,
+                             processed=4096)
+        """
+        budget = Budget(max_bytes, timeout, chunk_size)
+        scores, partial, processed = score_within(
+            self._model, content, budget, self._prefilter
+        )
+        return BoundedDetection(self._choose(scores), partial, processed)
+
+    def probe_within(  # pylint: disable=too-many-arguments
+        self,
+        content: Buffer,
+        top: int = 3,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+        chunk_size: int = 65536,
+    ) -> BoundedProbe:
+        """
+        Detect `top` probable encodings with confidences within a byte
+        or time budget, see `Detector.detect_within` for budget arguments
+
+        Args:
+            content: Encoded text, any object supporting buffer protocol
+            top: How many of the most likely encodings to return
+
+        Returns:
+            Confident encodings with confidences detected from the processed
+            bytes, and whether content was processed partially
+        """
+        budget = Budget(max_bytes, timeout, chunk_size)
+        scores, partial, processed = score_within(
+            self._model, content, budget, self._prefilter
+        )
+        return BoundedProbe(self._rank(scores, top), partial, processed)
+
+    def segment(
+        self, content: Buffer, window: int = 1024, step: int = 256
+    ) -> List[Segment]:
+        """
+        Split content that mixes several encodings into single-encoding regions
+
+        Content is labeled in blocks of `step` bytes, each block gets the most
+        probable encoding of the `window` bytes around it. Features of the sliding
+        window are updated incrementally, so content is processed in a single pass
+
+        Args:
+            content: Encoded text, e.g. concatenation of several documents
+            window: Size of content window that is used to detect encoding of a block
+            step: Size of blocks that are labeled with encodings
+
+        Returns:
+            Consecutive regions with their encodings (or `None` if not confident
+            enough) and average confidences, that cover the whole content
+
+        Example:
+            >>> detector = Detector()
+            >>> detector.segment('привет, мир! '.encode('utf_8') * 100 +
+            ...                  'привет, мир! '.encode('cp1251') * 100)
+            [Segment(start=0, end=2304, encoding=<Encoding.UTF_8: 'utf_8'>, ...),
+             Segment(start=2304, end=3500, encoding=<Encoding.CP_1251: 'cp1251'>, ...)]
+        """
+        if window < 2:
+            raise ValueError('window must be at least 2 bytes')
+
+        if not 0 < step <= window:
+            raise ValueError('step must be in range [1, window]')
+
+        content = _to_view(content)
+        accumulator = self._model.accumulator()
+        size = len(content)
+        bounds = (0, 0)
+        segments: List[Segment] = []
+        totals: List[float] = []
+        for start in range(0, size, step):
+            end = min(start + step, size)
+            target = max(0, min((start + end - window) // 2, size - window))
+            bounds = accumulator.slide(content, bounds, (target, target + window))
+            encoding, confidence = self._label(accumulator.scores)
+
+            if segments and segments[-1].encoding == encoding:
+                segments[-1] = segments[-1]._replace(end=end)
+                totals[-1] += confidence * (end - start)
+            else:
+                segments.append(Segment(start, end, encoding, confidence))
+                totals.append(confidence * (end - start))
+
         return [
-            (encoding, confidence)
-            for encoding, confidence in confidences
-            if confidence >= self._min_confidence
+            segment._replace(confidence=total / (segment.end - segment.start))
+            for segment, total in zip(segments, totals)
         ]
@@ -0,0 +1,104 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import array
+import collections
+import mmap
+import sys
+from typing import Dict, Set, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]  # Supports buffer protocol
+
+_BIGRAMS = array.array('H', range(256 * 256))  # Bi-gram of each 16-bit word
+if sys.byteorder == 'little':
+    _BIGRAMS.byteswap()
+
+
+def _to_view(content: Buffer) -> memoryview:
+    """
+    Get flat byte view of content without copying it
+
+    Args:
+        content: Any object supporting buffer protocol, non-contiguous
+            buffers are copied
+
+    Returns:
+        Memory view of unsigned bytes
+    """
+    view = memoryview(content)
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
+    return view.cast('B')
+
+
+def _get_words(view: memoryview) -> Tuple[memoryview, memoryview]:
+    """
+    View bytes as 16-bit words at even and odd offsets, that together cover
+    all byte bi-grams, so that they are extracted without iterating over
+    byte pairs in Python
+
+    Args:
+        view: Memory view of unsigned bytes
+
+    Returns:
+        Memory views of words at even and odd offsets, in native byte order
+    """
+    size = len(view)
+    return (
+        view[: size - size % 2].cast('H'),
+        view[1 : 1 + (size - 1) // 2 * 2].cast('H'),
+    )
+
+
+def _get_features(content: Buffer) -> Set[int]:
+    """
+    Extract unique byte uni-grams and bi-grams
+
+    Args:
+        content: Encoded text, any object supporting buffer protocol
+
+    Returns:
+        Set of integers that represent byte n-grams
+    """
+    view = _to_view(content)
+    even, odd = _get_words(view)
+    words = set(even)
+    words.update(odd)
+    return set(view).union(map(_BIGRAMS.__getitem__, words))
+
+
+def _count_features(view: memoryview) -> Dict[int, int]:
+    """
+    Count byte uni-grams and bi-grams
+
+    Args:
+        view: Memory view of unsigned bytes
+
+    Returns:
+        Mapping from integers that represent byte n-grams to their counts
+    """
+    counts = collections.Counter(view)
+    even, odd = _get_words(view)
+    words = collections.Counter(even)
+    words.update(odd)
+    for word, count in words.items():
+        counts[_BIGRAMS[word]] += count
+    return counts
+
+
+def _get_feature_counts(content: Buffer) -> Dict[int, float]:
+    """
+    Count byte uni-grams and bi-grams relative to the total number of n-grams
+
+    Args:
+        content: Encoded text, any object supporting buffer protocol
+
+    Returns:
+        Mapping from integers that represent byte n-grams to their frequencies
+    """
+    view = _to_view(content)
+    total = max(2 * len(view) - 1, 1)
+    return {feature: count / total for feature, count in _count_features(view).items()}
@@ -0,0 +1,496 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import array
+import collections.abc
+import math
+import mmap
+import os
+import pathlib
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from charamel.encoding import Encoding
+from charamel.features import Buffer
+from charamel.resources import (
+    RESOURCE_DIRECTORY,
+    Resources,
+    dump_biases,
+    dump_features,
+    dump_scoring,
+    dump_weights,
+    load_biases,
+    load_features,
+    load_scoring,
+    load_weights,
+    read_resources,
+)
+from charamel.scoring import (
+    FEATURE_SPACE,
+    UNKNOWN_FEATURE,
+    ScoreAccumulator,
+    Scoring,
+    SparseWeights,
+)
+from charamel.serialization import ModelArrays, pack_model, unpack_model
+
+
+def _create_lookup(features: Sequence[int]) -> Sequence[int]:
+    """
+    Create table that maps every possible feature to its index in given features
+    """
+    lookup = array.array('i', [UNKNOWN_FEATURE]) * FEATURE_SPACE
+    for index, feature in enumerate(features):
+        lookup[feature] = index
+    return lookup
+
+
+class _FeatureIndex(collections.abc.Mapping):
+    """
+    Read-only mapping from features to their indices in weight matrix
+    """
+
+    def __init__(self, features: Sequence[int], lookup: Sequence[int]):
+        self._features = features
+        self._lookup = lookup
+
+    def __getitem__(self, feature: int) -> int:
+        index = self._lookup[feature] if 0 <= feature < FEATURE_SPACE else -1
+        if index == UNKNOWN_FEATURE:
+            raise KeyError(feature)
+        return index
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._features)
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+
+class Model:
+    """
+    Linear model that scores byte n-gram features for each encoding
+
+    Weights are stored as a sparse matrix with a row for each feature,
+    so scoring a feature costs only as much as its non-zero weights
+    """
+
+    def __init__(
+        self,
+        features: Mapping[int, int],
+        weights: Mapping[Encoding, Sequence[float]],
+        biases: Mapping[Encoding, float],
+        scoring: Scoring = Scoring.PRESENCE,
+        threshold: float = 0.0,
+    ):
+        """
+        Create linear model from its parameters
+
+        Args:
+            features: Mapping from features to their indices in weight matrix
+            weights: Mapping from encodings to their weights, indexed by feature index
+            biases: Mapping from encodings to their biases
+            scoring: How features of content contribute to scores
+            threshold: Weights with absolute values not greater than threshold
+                are not stored, zero keeps detection results intact
+        """
+        if weights.keys() != biases.keys():
+            raise ValueError('Weights and biases must have the same encodings')
+
+        if threshold < 0.0:
+            raise ValueError('threshold must be non-negative')
+
+        ordered = sorted(features, key=features.__getitem__)
+        encodings = [Encoding(encoding) for encoding in weights]
+        self._features: Sequence[int] = array.array('H', ordered)
+        self._lookup = _create_lookup(ordered)
+        self._matrix = SparseWeights.from_dense(
+            list(weights.values()), len(ordered), threshold
+        )
+        self._columns = {encoding: column for column, encoding in enumerate(encodings)}
+        self.biases = {encoding: biases[encoding] for encoding in encodings}
+        self.scoring = Scoring(scoring)
+        self.source: Optional[pathlib.Path] = None
+
+    @classmethod
+    def _create(
+        cls,
+        arrays: ModelArrays,
+        columns: Dict[Encoding, int],
+        source: Optional[pathlib.Path],
+    ) -> 'Model':
+        """
+        Create model from already prepared arrays, without copying them
+        """
+        model = cls.__new__(cls)
+        model._features = arrays.features
+        model._lookup = arrays.lookup
+        model._matrix = arrays.matrix
+        model._columns = columns
+        model.biases = arrays.biases
+        model.scoring = arrays.scoring
+        model.source = source
+        return model
+
+    @property
+    def encodings(self) -> List[Encoding]:
+        """
+        Encodings supported by this model
+        """
+        return list(self.biases)
+
+    @property
+    def features(self) -> Mapping[int, int]:
+        """
+        Mapping from features to their indices in weight matrix
+        """
+        return _FeatureIndex(self._features, self._lookup)
+
+    @property
+    def weights(self) -> Dict[Encoding, Sequence[float]]:
+        """
+        Dense weights of each encoding, indexed by feature index
+
+        Weights are decompressed on every access, use for inspection only
+        """
+        vectors = self._matrix.to_dense()
+        return {
+            encoding: array.array('f', vectors[column])
+            for encoding, column in self._columns.items()
+        }
+
+    @property
+    def nonzeros(self) -> int:
+        """
+        Number of stored weights, including ones of encodings not selected
+        """
+        return len(self._matrix.values)
+
+    def _get_rows(self, features: Iterable[int]) -> List[int]:
+        """
+        Get weight matrix rows of known features
+        """
+        return [
+            row
+            for row in map(self._lookup.__getitem__, features)
+            if row != UNKNOWN_FEATURE
+        ]
+
+    def _to_scores(self, sums: List[float]) -> Dict[Encoding, float]:
+        """
+        Combine weight sums of matrix columns with biases
+        """
+        columns = self._columns
+        return {
+            encoding: bias + sums[columns[encoding]]
+            for encoding, bias in self.biases.items()
+        }
+
+    def score(self, features: Iterable[int]) -> Dict[Encoding, float]:
+        """
+        Compute real-valued score of each encoding for given set of features,
+        each of them contributes with its weight
+
+        Args:
+            features: Byte n-gram features, unknown features are ignored
+
+        Returns:
+            Real-valued score for each encoding
+        """
+        offsets, columns, values, width = self._matrix
+        sums = [0.0] * width
+        for row in self._get_rows(features):
+            start, end = offsets[row], offsets[row + 1]
+            for column, value in zip(columns[start:end], values[start:end]):
+                sums[column] += value
+        return self._to_scores(sums)
+
+    def score_frequencies(
+        self, frequencies: Mapping[int, float]
+    ) -> Dict[Encoding, float]:
+        """
+        Compute real-valued score of each encoding for given feature frequencies,
+        each feature contributes with its weight times its frequency
+
+        Args:
+            frequencies: Relative counts of byte n-gram features in content,
+                unknown features are ignored
+
+        Returns:
+            Real-valued score for each encoding
+        """
+        offsets, columns, values, width = self._matrix
+        sums = [0.0] * width
+        rows = map(self._lookup.__getitem__, frequencies)
+        for row, frequency in zip(rows, frequencies.values()):
+            if row != UNKNOWN_FEATURE:
+                start, end = offsets[row], offsets[row + 1]
+                for column, value in zip(columns[start:end], values[start:end]):
+                    sums[column] += value * frequency
+        return self._to_scores(sums)
+
+    def accumulator(self) -> ScoreAccumulator:
+        """
+        Create incrementally updated scores, that start from an empty set of features
+
+        Returns:
+            Score accumulator for this model
+        """
+        return ScoreAccumulator(
+            self._lookup, self._matrix, self._columns, self.biases, self.scoring
+        )
+
+    def _check_encodings(self, encodings: Sequence[Encoding]) -> None:
+        """
+        Check that model supports all of the given encodings
+        """
+        if not encodings:
+            raise ValueError('No encodings specified')
+
+        unsupported = set(encodings).difference(self._columns)
+        if unsupported:
+            names = ', '.join(sorted(encoding.value for encoding in unsupported))
+            raise ValueError(f'Encodings are not supported by model: {names}')
+
+    def select(self, encodings: Sequence[Encoding]) -> 'Model':
+        """
+        Restrict model to given encodings, sharing weights with this model
+
+        Args:
+            encodings: Encodings that the restricted model will support
+
+        Returns:
+            Model that supports only given encodings
+        """
+        self._check_encodings(encodings)
+        arrays = ModelArrays(
+            features=self._features,
+            lookup=self._lookup,
+            matrix=self._matrix,
+            biases={encoding: self.biases[encoding] for encoding in encodings},
+            scoring=self.scoring,
+        )
+        columns = {encoding: self._columns[encoding] for encoding in encodings}
+        return self._create(arrays, columns, self.source)
+
+    def _restrict(self, encodings: Sequence[Encoding], threshold: float) -> 'Model':
+        """
+        Copy weights of given encodings that are greater than threshold
+        in absolute value, dropping features that have no weights left
+        """
+        selected = [self._columns[encoding] for encoding in encodings]
+        matrix, rows = self._matrix.select(selected, threshold)
+        features = array.array('H', [self._features[row] for row in rows])
+        arrays = ModelArrays(
+            features=features,
+            lookup=_create_lookup(features),
+            matrix=matrix,
+            biases={encoding: self.biases[encoding] for encoding in encodings},
+            scoring=self.scoring,
+        )
+        columns = {encoding: column for column, encoding in enumerate(encodings)}
+        return self._create(arrays, columns, None)
+
+    def compile(self, encodings: Sequence[Encoding], threshold: float = 0.0) -> 'Model':
+        """
+        Specialise model for given encodings
+
+        Weights with absolute values not greater than `threshold` are pruned,
+        as well as features that have no weights left for the given encodings,
+        and the weight matrix is re-indexed
+
+        Args:
+            encodings: Encodings that the specialised model will support
+            threshold: Absolute weight value that is considered negligible,
+                zero keeps detection results intact
+
+        Returns:
+            Smaller model that supports only given encodings
+
+        Example:
+            >>> model = Model.load().compile([Encoding.BIG_5, Encoding.GB_K])
+            >>> detector = Detector.from_model(model)
+        """
+        self._check_encodings(encodings)
+        if threshold < 0.0:
+            raise ValueError('threshold must be non-negative')
+
+        return self._restrict(encodings, threshold)
+
+    @classmethod
+    def from_resources(
+        cls,
+        resources: Resources,
+        encodings: Optional[Sequence[Encoding]] = None,
+        threshold: float = 0.0,
+    ) -> 'Model':
+        """
+        Create model for given encodings from contents of resource files
+
+        Args:
+            resources: Contents of model resource files, see `read_resources`
+            encodings: Encodings to load weights and biases for, `None` for
+                all encodings listed in resources
+            threshold: Weights with absolute values not greater than threshold
+                are not stored, zero keeps detection results intact
+
+        Returns:
+            Loaded model, that does not reference its resource directory
+        """
+        biases = load_biases(resources, encodings)
+        return cls(
+            features=load_features(resources),
+            weights=load_weights(resources, list(biases)),
+            biases=biases,
+            scoring=Scoring(load_scoring(resources)),
+            threshold=threshold,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        encodings: Optional[Sequence[Encoding]] = None,
+        directory: pathlib.Path = RESOURCE_DIRECTORY,
+        threshold: float = 0.0,
+    ) -> 'Model':
+        """
+        Load model for given encodings from resource directory
+
+        Args:
+            encodings: Encodings to load weights and biases for, `None` for
+                all encodings listed in the directory
+            directory: Directory with model resources, defaults to bundled model
+            threshold: Weights with absolute values not greater than threshold
+                are not stored, zero keeps detection results intact. Pruned
+                models do not reference the directory, so serialized detectors
+                embed their weights
+
+        Returns:
+            Loaded model
+        """
+        resources = read_resources(directory, encodings)
+        model = cls.from_resources(resources, encodings, threshold)
+        model.source = directory if not threshold else None
+        return model
+
+    def save(self, directory: pathlib.Path) -> None:
+        """
+        Store model in resource directory, so that it can be loaded with `Model.load`
+
+        Args:
+            directory: Directory to store model resources in
+        """
+        dump_features(self.features, directory)
+        dump_weights(self.weights, directory)
+        dump_biases(self.biases, directory)
+        dump_scoring(self.scoring.value, directory)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize model into a single binary blob
+
+        The blob is laid out so that `Model.from_bytes` can use it in place,
+        e.g. from a memory-mapped file that is shared between processes
+
+        Returns:
+            Binary model representation
+        """
+        if list(self._columns.values()) != list(range(self._matrix.width)):
+            return self._restrict(self.encodings, -math.inf).to_bytes()
+
+        arrays = ModelArrays(
+            self._features, self._lookup, self._matrix, self.biases, self.scoring
+        )
+        return pack_model(arrays)
+
+    @classmethod
+    def from_bytes(cls, data: Buffer, source: Optional[pathlib.Path] = None) -> 'Model':
+        """
+        Deserialize model from binary blob created by `Model.to_bytes`
+
+        Weights are not copied, the model keeps referencing given buffer
+
+        Args:
+            data: Binary model representation, any object supporting buffer protocol
+            source: File that stores the blob, if any
+
+        Returns:
+            Deserialized model
+        """
+        arrays = unpack_model(data)
+        columns = {encoding: column for column, encoding in enumerate(arrays.biases)}
+        return cls._create(arrays, columns, source)
+
+    def dump(self, path: pathlib.Path) -> None:
+        """
+        Store model as a single binary file, so that it can be opened with `Model.open`
+
+        The file is written next to the target and renamed over it, so that
+        processes that have the old file memory-mapped keep reading its contents
+
+        Args:
+            path: File to store model in
+        """
+        path = pathlib.Path(path)
+        mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+        descriptor, temporary = tempfile.mkstemp(
+            prefix=f'.{path.name}.', suffix='.tmp', dir=str(path.parent)
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(self.to_bytes())
+            os.chmod(temporary, mode)
+            os.replace(temporary, str(path))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @classmethod
+    def open(cls, path: pathlib.Path) -> 'Model':
+        """
+        Memory-map model file created by `Model.dump`
+
+        Each file is mapped once per process, so pages with weights are shared
+        between all models and processes that open it. A file that is replaced,
+        e.g. by `Model.dump`, is mapped again on the next call. Files must not be
+        rewritten in place while they are open
+
+        Args:
+            path: File that stores the model
+
+        Returns:
+            Model that references memory-mapped weights
+        """
+        model, _ = _map_model(pathlib.Path(path).resolve())
+        return model
+
+
+_MAPPED_LOCK = threading.Lock()
+_MAPPED: Dict[pathlib.Path, Tuple[Tuple[int, int], Model, mmap.mmap]] = {}
+
+
+def _map_model(path: pathlib.Path) -> Tuple[Model, mmap.mmap]:
+    """
+    Memory-map model file, cached by file path until the file changes: the stale
+    model is dropped then, and its mapping is released once nothing references it
+
+    Returns:
+        Model and the mapping it references, e.g. to validate exactly
+        the contents that the model uses
+    """
+    stat = path.stat()
+    with _MAPPED_LOCK:
+        cached = _MAPPED.get(path)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1], cached[2]
+
+        with path.open('rb') as file:
+            stat = os.fstat(file.fileno())
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        model = Model.from_bytes(mapped, source=path)
+        _MAPPED[path] = (stat.st_mtime_ns, stat.st_size), model, mapped
+        return model, mapped
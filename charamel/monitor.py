@@ -0,0 +1,161 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import collections
+import threading
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from charamel.encoding import Encoding
+
+Item = Tuple[Optional[Encoding], int, bool]  # Encoding, histogram bin, low confidence
+
+
+class Snapshot(NamedTuple):
+    """
+    Statistics of detections in a rolling window, `None` stands for detections
+    without a confident encoding
+    """
+
+    total: int
+    counts: Dict[Optional[Encoding], int]
+    low_confidence: Dict[Optional[Encoding], int]
+    histograms: Dict[Optional[Encoding], List[int]]
+
+    @property
+    def shares(self) -> Dict[Optional[Encoding], float]:
+        """
+        Share of detections of each encoding
+        """
+        return {encoding: count / self.total for encoding, count in self.counts.items()}
+
+    @property
+    def low_confidence_rate(self) -> float:
+        """
+        Share of detections with confidence below the monitor threshold
+        """
+        return sum(self.low_confidence.values()) / self.total if self.total else 0.0
+
+    def drift(self, reference: 'Snapshot') -> float:
+        """
+        Measure how much the encoding mix has shifted, as total variation distance
+        between encoding shares of this and reference snapshots
+
+        Args:
+            reference: Snapshot of expected traffic, e.g. taken a day before
+
+        Returns:
+            Distance in range [0, 1], zero for identical encoding mixes
+        """
+        shares, expected = self.shares, reference.shares
+        encodings = set(shares).union(expected)
+        return sum(
+            abs(shares.get(encoding, 0.0) - expected.get(encoding, 0.0))
+            for encoding in encodings
+        ) / 2
+
+
+class Monitor:
+    """
+    Rolling statistics of a stream of detections, with constant cost per detection
+    and memory bounded by window size
+
+    Updates hold a lock only to adjust a few counters, and snapshots copy
+    counters that do not depend on window size, so monitoring can be shared
+    between threads that serve detections
+    """
+
+    def __init__(
+        self, window: int = 10000, min_confidence: float = 0.5, bins: int = 10
+    ):
+        """
+        Create detection monitor
+
+        Args:
+            window: Number of the most recent detections that statistics cover
+            min_confidence: Detections with lower confidence are counted as
+                low-confidence, usually above the detector threshold
+            bins: Number of confidence histogram bins, that split [0, 1] evenly
+
+        Example:
+            >>> monitor = Monitor(window=100000, min_confidence=0.9)
+            >>> monitor.update(detector.probe(content))
+            >>> monitor.snapshot().low_confidence_rate
+            0.013
+        """
+        if window < 1:
+            raise ValueError('window must be positive')
+
+        if bins < 1:
+            raise ValueError('bins must be positive')
+
+        if not 0.0 <= min_confidence <= 1.0:
+            raise ValueError('min_confidence must be in range [0, 1]')
+
+        self._min_confidence = min_confidence
+        self._bins = bins
+        self._window: Deque[Item] = collections.deque(maxlen=window)
+        self._counts: Dict[Optional[Encoding], int] = collections.Counter()
+        self._low_confidence: Dict[Optional[Encoding], int] = collections.Counter()
+        self._histograms: Dict[Optional[Encoding], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, item: Item, sign: int) -> None:
+        """
+        Add or withdraw detection from counters
+        """
+        encoding, position, low = item
+        self._counts[encoding] += sign
+        self._low_confidence[encoding] += sign * low
+        histogram = self._histograms.get(encoding)
+        if histogram is None:
+            histogram = self._histograms[encoding] = [0] * self._bins
+        histogram[position] += sign
+
+    def observe(self, encoding: Optional[Encoding], confidence: float) -> None:
+        """
+        Record a single detection, evicting the oldest one if window is full
+
+        Args:
+            encoding: Detected encoding, or `None` if not confident enough
+            confidence: Confidence of detected encoding
+        """
+        position = min(int(confidence * self._bins), self._bins - 1)
+        item = (encoding, position, confidence < self._min_confidence)
+        with self._lock:
+            if len(self._window) == self._window.maxlen:
+                self._count(self._window[0], -1)
+            self._window.append(item)
+            self._count(item, 1)
+
+    def update(self, probe: Sequence[Tuple[Encoding, float]]) -> None:
+        """
+        Record result of `Detector.probe`, only the most likely encoding is counted;
+        empty results count as detections without encoding and zero confidence
+
+        Args:
+            probe: Encodings with confidences, the most likely first
+        """
+        encoding, confidence = probe[0] if probe else (None, 0.0)
+        self.observe(encoding, confidence)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Copy current statistics, encodings that left the window are omitted
+
+        Returns:
+            Statistics of detections in the window
+        """
+        with self._lock:
+            total = len(self._window)
+            counts = dict(self._counts)
+            low_confidence = dict(self._low_confidence)
+            histograms = {e: list(h) for e, h in self._histograms.items()}
+        return Snapshot(
+            total=total,
+            counts={encoding: count for encoding, count in counts.items() if count},
+            low_confidence={e: low_confidence[e] for e in counts if counts[e]},
+            histograms={e: histograms[e] for e in counts if counts[e]},
+        )
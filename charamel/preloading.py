@@ -0,0 +1,59 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import gc
+import pathlib
+from typing import Optional, Sequence
+
+from charamel.detector import _get_model
+from charamel.encoding import Encoding
+from charamel.model import Model
+from charamel.validity import _get_exclusions
+
+
+def preload(
+    encodings: Sequence[Encoding] = tuple(Encoding),
+    source: Optional[pathlib.Path] = None,
+    prefilter: bool = False,
+    freeze: bool = True,
+) -> Model:
+    """
+    Load model once in the parent process of a prefork server, so that workers
+    share its memory instead of loading their own copies after fork
+
+    The model is cached for the process. `Detector` instances with the same
+    encodings reuse it only for the bundled model (`source` is `None`), a model
+    from a custom `source` must be passed to workers with `Detector.from_model`.
+    Weights are stored in arrays, that are never written to, and with `freeze`
+    all objects that exist before fork are moved out of reach of garbage
+    collector (Python 3.7+), so that collections in workers do not touch, and
+    thus copy, pages of the parent
+
+    Args:
+        encodings: Encodings to load model for
+        source: Model resource directory or model file, `None` for bundled model
+        prefilter: Whether to also build validity tables for `prefilter=True`
+        freeze: Whether to freeze objects with `gc.freeze`, call `preload` right
+            before forking workers then
+
+    Returns:
+        Loaded model
+
+    Example:
+        >>> charamel.preload()  # In the master process, e.g. in gunicorn `when_ready`
+        >>> detector = Detector()  # In workers, almost free
+    """
+    if not encodings:
+        raise ValueError('No encodings specified')
+
+    model = _get_model(None if source is None else str(source), tuple(encodings))
+    if prefilter:
+        _get_exclusions(tuple(model.encodings))
+
+    if freeze and hasattr(gc, 'freeze'):  # Python 3.7+
+        gc.collect()
+        gc.freeze()
+    return model
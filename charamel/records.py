@@ -0,0 +1,211 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import collections
+import itertools
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TypeVar
+
+from charamel.detector import Detector
+from charamel.encoding import Encoding
+from charamel.features import Buffer, _to_view
+
+T = TypeVar('T')  # pylint: disable=invalid-name
+
+
+class Summary(NamedTuple):
+    """
+    Aggregated encoding of many records
+    """
+
+    encoding: Optional[Encoding]
+    share: float
+    counts: Dict[Optional[Encoding], int]
+
+
+def _iter_batches(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Split items into lists of given size, the last list may be shorter
+    """
+    iterator = iter(items)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def _split(content: memoryview, separator: bytes) -> Iterator[memoryview]:
+    """
+    Lazily split memory view by separator, without copying parts
+    """
+    start = 0
+    for match in re.finditer(re.escape(separator), content):
+        yield content[start : match.start()]
+        start = match.end()
+    yield content[start:]
+
+
+def iter_records(content: Buffer, delimiter: bytes = b'\n') -> Iterator[memoryview]:
+    """
+    Lazily split content into records, the empty record after a trailing
+    delimiter is skipped
+
+    Records are memory views of content, so they are not copied
+
+    Args:
+        content: Encoded delimited data, e.g. CSV or JSON Lines file,
+            any object supporting buffer protocol
+        delimiter: Byte sequence that separates records
+
+    Returns:
+        Iterator over records
+    """
+    if not delimiter:
+        raise ValueError('Empty delimiter')
+
+    previous: Optional[memoryview] = None
+    for record in _split(_to_view(content), delimiter):
+        if previous is not None:
+            yield previous
+        previous = record
+    if previous:
+        yield previous
+
+
+def _detect_unique(
+    detector: Detector, records: List[memoryview]
+) -> List[Optional[Encoding]]:
+    """
+    Detect encodings of records, scoring each distinct record only once;
+    records of writable buffers are not hashable, so all of them are scored
+    """
+    try:
+        unique = dict.fromkeys(records)
+    except ValueError:
+        return detector.detect_batch(records)
+
+    detected = dict(zip(unique, detector.detect_batch(unique)))
+    return [detected[record] for record in records]
+
+
+def detect_records(
+    detector: Detector,
+    content: Buffer,
+    delimiter: bytes = b'\n',
+    batch_size: int = 1024,
+) -> Iterator[Optional[Encoding]]:
+    """
+    Detect encoding of each record in delimited data
+
+    Records are scored in batches, so only `batch_size` records are held
+    in memory at a time, and repeated records within a batch are scored once.
+    Features are extracted record by record: summing weights dominates
+    the cost, so extracting them for a whole batch in one pass over content
+    is not faster
+
+    Args:
+        detector: Encoding detector
+        content: Encoded delimited data, e.g. CSV or JSON Lines file,
+            any object supporting buffer protocol
+        delimiter: Byte sequence that separates records
+        batch_size: Number of records scored at a time
+
+    Returns:
+        Iterator over encodings (or `None` if not confident enough) of records
+
+    Example:
+        >>> detector = Detector()
+        >>> list(detect_records(detector, b'hello\\n\\xef\\xf0\\xe8\\xe2\\xe5\\xf2\\n'))
+        [<Encoding.ASCII: 'ascii'>, <Encoding.CP_1251: 'cp1251'>]
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be positive')
+
+    for batch in _iter_batches(iter_records(content, delimiter), batch_size):
+        yield from _detect_unique(detector, batch)
+
+
+def detect_fields(
+    detector: Detector,
+    content: Buffer,
+    delimiter: bytes = b'\n',
+    separator: bytes = b',',
+    batch_size: int = 1024,
+) -> Iterator[List[Optional[Encoding]]]:
+    """
+    Detect encoding of each field of each record in delimited data
+
+    Fields are split naively, so quoted separators are not supported
+
+    Args:
+        detector: Encoding detector
+        content: Encoded delimited data, e.g. CSV or TSV file,
+            any object supporting buffer protocol
+        delimiter: Byte sequence that separates records
+        separator: Byte sequence that separates fields within a record
+        batch_size: Number of records scored at a time
+
+    Returns:
+        Iterator over lists of field encodings (or `None` if not confident enough)
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be positive')
+
+    for batch in _iter_batches(iter_records(content, delimiter), batch_size):
+        rows = [list(_split(record, separator)) for record in batch]
+        detected = iter(_detect_unique(detector, [f for row in rows for f in row]))
+        for row in rows:
+            yield list(itertools.islice(detected, len(row)))
+
+
+def summarize(encodings: Iterable[Optional[Encoding]]) -> Summary:
+    """
+    Aggregate record encodings into a single encoding, e.g. of the whole file
+
+    Args:
+        encodings: Encodings of records, `None` for records without confident encoding
+
+    Returns:
+        The most common confident encoding with the share of records
+        that have it, and the number of records for each encoding
+
+    Example:
+        >>> summarize(detect_records(Detector(), content))
+        Summary(encoding=<Encoding.UTF_8: 'utf_8'>, share=0.98, counts={...})
+    """
+    return _summarize_counts(collections.Counter(encodings))
+
+
+def _summarize_counts(counts: Dict[Optional[Encoding], int]) -> Summary:
+    """
+    Aggregate numbers of records for each encoding
+    """
+    total = sum(counts.values())
+    confident = [(count, encoding) for encoding, count in counts.items() if encoding]
+    if not confident:
+        return Summary(None, 0.0, dict(counts))
+
+    count, encoding = max(confident, key=lambda x: x[0])
+    return Summary(encoding, count / total, dict(counts))
+
+
+def summarize_fields(rows: Iterable[List[Optional[Encoding]]]) -> List[Summary]:
+    """
+    Aggregate field encodings into a single encoding for each column
+
+    Args:
+        rows: Lists of field encodings, as produced by `detect_fields`
+
+    Returns:
+        Summary for each column, in order of columns
+    """
+    columns: List[collections.Counter] = []
+    for row in rows:
+        for index, encoding in enumerate(row):
+            if index == len(columns):
+                columns.append(collections.Counter())
+            columns[index][encoding] += 1
+    return [_summarize_counts(column) for column in columns]
@@ -0,0 +1,162 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import concurrent.futures
+import pathlib
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from charamel.detector import Detector
+from charamel.model import Model, _map_model
+from charamel.resources import checksum_resources, read_resources
+
+
+class ModelVersion(NamedTuple):
+    """
+    Model that a detector uses
+    """
+
+    number: int  # Number of successful reloads before the model was swapped in
+    checksum: Optional[str]
+    source: Optional[pathlib.Path]
+    loaded_at: float  # Unix timestamp
+
+
+class ReloadMetrics(NamedTuple):
+    """
+    Model version in use and reload statistics
+    """
+
+    version: ModelVersion
+    reloads: int
+    failures: int
+    last_error: Optional[str]
+
+
+def _validate(actual: str, expected: str) -> None:
+    """
+    Check that model checksum is the expected one
+    """
+    if actual != expected:
+        raise ValueError(f'Model checksum mismatch: expected {expected}, got {actual}')
+
+
+class ModelReloader:
+    """
+    Hot reloader of detector model, that loads new weights in a background thread
+    and swaps them in without interrupting detections
+    """
+
+    def __init__(self, detector: Detector, checksum: Optional[str] = None):
+        """
+        Create model reloader
+
+        Args:
+            detector: Detector to reload model of
+            checksum: Checksum of the current detector model, if known
+
+        Example:
+            >>> reloader = ModelReloader(detector)
+            >>> future = reloader.reload(pathlib.Path('model'), checksum='9f86d0...')
+            >>> future.result().number
+            1
+        """
+        self._detector = detector
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='charamel-reload'
+        )
+        self._lock = threading.Lock()
+        self._version = ModelVersion(
+            0,
+            checksum,
+            detector._model.source,  # pylint: disable=protected-access
+            time.time(),
+        )
+        self._reloads = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+
+    @property
+    def metrics(self) -> ReloadMetrics:
+        """
+        Model version in use and reload statistics
+        """
+        with self._lock:
+            return ReloadMetrics(
+                self._version, self._reloads, self._failures, self._last_error
+            )
+
+    def _load(self, path: pathlib.Path, checksum: str) -> ModelVersion:
+        """
+        Validate and load model, then swap it into detector; the checksum
+        is computed over the same contents that the model is loaded from
+
+        Args:
+            path: Directory with model resources, or model file created by `Model.dump`
+            checksum: Expected checksum of model, see `compute_checksum`
+
+        Returns:
+            Version of swapped in model
+        """
+        try:
+            encodings = self._detector.encodings
+            if path.is_dir():
+                resources = read_resources(path)
+                _validate(checksum_resources(resources), checksum)
+                model = Model.from_resources(resources, encodings)
+                model.source = path
+            else:
+                mapped, data = _map_model(path.resolve())
+                _validate(checksum_resources({'.': data}), checksum)
+                model = mapped.select(encodings)
+        except Exception as error:
+            with self._lock:
+                self._failures += 1
+                self._last_error = str(error)
+            raise
+
+        with self._lock:
+            self._reloads += 1
+            self._version = ModelVersion(self._reloads, checksum, path, time.time())
+            self._detector.swap_model(model)
+            return self._version
+
+    def reload(
+        self, path: pathlib.Path, checksum: str
+    ) -> 'concurrent.futures.Future[ModelVersion]':
+        """
+        Start loading new model in background, the detector keeps using
+        the current model until the new one is validated and loaded
+
+        Reloads are performed one at a time, in order of requests. If the model
+        fails validation or loading, the current model stays in use
+
+        Model files are memory-mapped, so a new model must be written to a new
+        file, or to a temporary one that is renamed over the old file, as
+        `Model.dump` does. Rewriting the file in place crashes detectors that
+        still use the old model
+
+        Args:
+            path: Directory with model resources, or model file created by `Model.dump`
+            checksum: Expected checksum of model, see `compute_checksum`
+
+        Returns:
+            Future with version of swapped in model
+        """
+        return self._executor.submit(self._load, pathlib.Path(path), checksum)
+
+    def close(self) -> None:
+        """
+        Wait for pending reloads and stop background thread
+        """
+        self._executor.shutdown()
+
+    def __enter__(self) -> 'ModelReloader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
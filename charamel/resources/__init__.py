@@ -4,69 +4,285 @@
 
 Licensed under Apache 2.0
 """
+import functools
 import gzip
+import hashlib
 import pathlib
 import struct
-from typing import Any, Dict, List, Sequence
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from charamel.encoding import Encoding
 
 RESOURCE_DIRECTORY = pathlib.Path(__file__).parent.absolute()
 WEIGHT_DIRECTORY = RESOURCE_DIRECTORY / 'weights'
+SCORING_FILE = 'scoring.txt'
+DEFAULT_SCORING = 'presence'
 
 
-def _unpack(file: pathlib.Path, pattern: str) -> List[Any]:
+Resources = Dict[str, bytes]  # Contents of resource files by path relative to model
+
+
+def _weight_file(encoding: Encoding) -> str:
+    """
+    Get path of weights file of given encoding relative to resource directory
+    """
+    return f'{WEIGHT_DIRECTORY.name}/{Encoding(encoding).value}.gzip'
+
+
+def _read(resources: Resources, name: str) -> bytes:
     """
-    Unpack struct values from file
+    Get contents of resource file that model can not be loaded without
+    """
+    try:
+        return resources[name]
+    except KeyError:
+        raise FileNotFoundError(f'Missing model resource: {name}') from None
+
+
+def _unpack(data: bytes, pattern: str) -> List[Any]:
+    """
+    Unpack struct values from compressed file contents
 
     Args:
-        file: File that stores struct-packed values
+        data: Gzip-compressed struct-packed values
         pattern: Struct pattern
 
     Returns:
         List of unpacked values
     """
-    with gzip.open(file, 'rb') as data:
-        return [values[0] for values in struct.iter_unpack(pattern, data.read())]
+    unpacked = gzip.decompress(data)
+    return [values[0] for values in struct.iter_unpack(pattern, unpacked)]
+
+
+def _pack(file: pathlib.Path, pattern: str, values: Iterable[Any]) -> None:
+    """
+    Pack values into file as struct values
+
+    Args:
+        file: File to store struct-packed values
+        pattern: Struct pattern
+        values: Values to pack
+    """
+    packer = struct.Struct(pattern)
+    with gzip.open(file, 'wb') as data:
+        data.write(b''.join(packer.pack(value) for value in values))
+
+
+def _list_files(path: pathlib.Path, weights: bool = True) -> List[pathlib.Path]:
+    """
+    List files of model resource directory, or model file itself
+    """
+    if not path.is_dir():
+        return [path]
 
+    files = [path / 'features.gzip', path / 'biases.gzip', path / SCORING_FILE]
+    files = [file for file in files if file.is_file()]
+    if weights:
+        files.extend(sorted((path / WEIGHT_DIRECTORY.name).glob('*.gzip')))
+    return files
 
-def load_features() -> Dict[int, int]:
+
+def read_resources(
+    directory: pathlib.Path = RESOURCE_DIRECTORY,
+    encodings: Optional[Sequence[Encoding]] = None,
+) -> Resources:
+    """
+    Read model resource files once, so that the model can be validated
+    and loaded from the same contents
+
+    Args:
+        directory: Directory with model resources
+        encodings: Encodings to read weights of, `None` for all encodings
+
+    Returns:
+        Mapping from file paths relative to directory to their contents
+    """
+    files = _list_files(directory, weights=encodings is None)
+    if encodings is not None:
+        files.extend(directory / _weight_file(encoding) for encoding in encodings)
+    return {file.relative_to(directory).as_posix(): file.read_bytes() for file in files}
+
+
+def load_features(resources: Resources) -> Dict[int, int]:
     """
     Load byte-level feature names and indices
 
+    Args:
+        resources: Contents of model resource files, see `read_resources`
+
     Returns:
         Mapping from features to their indices in weight matrix
     """
-    features = _unpack(RESOURCE_DIRECTORY / 'features.gzip', pattern='>H')
+    features = _unpack(_read(resources, 'features.gzip'), pattern='>H')
     return {feature: index for index, feature in enumerate(features)}
 
 
-def load_biases(encodings: Sequence[Encoding]) -> Dict[Encoding, float]:
+def load_biases(
+    resources: Resources, encodings: Optional[Sequence[Encoding]] = None
+) -> Dict[Encoding, float]:
     """
     Load linear model bias values for given encodings
 
     Args:
-        encodings: List of encodings
+        resources: Contents of model resource files, see `read_resources`
+        encodings: List of encodings, `None` for all encodings of the model
 
     Returns:
         Mapping from encodings to their biases
     """
     biases = {}
-    with gzip.open(RESOURCE_DIRECTORY / 'biases.gzip', 'rb') as data:
-        for line in data:
-            encoding, bias = line.decode().split()
-            biases[encoding] = float(bias)
+    for line in gzip.decompress(_read(resources, 'biases.gzip')).splitlines():
+        encoding, bias = line.decode().split()
+        biases[encoding] = float(bias)
 
+    if encodings is None:
+        encodings = [Encoding(encoding) for encoding in biases]
     return {encoding: biases[encoding] for encoding in encodings}
 
 
-def load_weights(encodings: Sequence[Encoding]) -> Dict[Encoding, List[float]]:
+def load_weights(
+    resources: Resources, encodings: Sequence[Encoding]
+) -> Dict[Encoding, List[float]]:
+    """
+    Load linear model weight vectors for given encodings
+
+    Args:
+        resources: Contents of model resource files, see `read_resources`
+        encodings: List of encodings
+
+    Returns:
+        Mapping from encodings to their weights, indexed by feature index
+    """
+    return {
+        encoding: _unpack(_read(resources, _weight_file(encoding)), pattern='>e')
+        for encoding in encodings
+    }
+
+
+def load_scoring(resources: Resources) -> str:
+    """
+    Load the name of the way features contribute to linear model scores
+
+    Args:
+        resources: Contents of model resource files, see `read_resources`
+
+    Returns:
+        Scoring name, models without scoring file use feature presence
+    """
+    if SCORING_FILE not in resources:
+        return DEFAULT_SCORING
+    return resources[SCORING_FILE].decode().strip()
+
+
+def dump_features(features: Mapping[int, int], directory: pathlib.Path) -> None:
+    """
+    Store byte-level feature names in the order of their indices
+
+    Args:
+        features: Mapping from features to their indices in weight matrix
+        directory: Directory with model resources
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    ordered = sorted(features, key=features.__getitem__)
+    _pack(directory / 'features.gzip', pattern='>H', values=ordered)
+
+
+def dump_biases(biases: Mapping[Encoding, float], directory: pathlib.Path) -> None:
+    """
+    Store linear model bias values
+
+    Args:
+        biases: Mapping from encodings to their biases
+        directory: Directory with model resources
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    with gzip.open(directory / 'biases.gzip', 'wb') as data:
+        for encoding, bias in biases.items():
+            data.write(f'{Encoding(encoding).value} {bias!r}\n'.encode())
+
+
+def dump_weights(
+    weights: Mapping[Encoding, Sequence[float]], directory: pathlib.Path
+) -> None:
+    """
+    Store linear model weight vectors
+
+    Args:
+        weights: Mapping from encodings to their weights, indexed by feature index
+        directory: Directory with model resources
+    """
+    weight_directory = directory / WEIGHT_DIRECTORY.name
+    weight_directory.mkdir(parents=True, exist_ok=True)
+    for encoding, values in weights.items():
+        file = weight_directory / f'{Encoding(encoding).value}.gzip'
+        _pack(file, pattern='>e', values=values)
+
+
+def dump_scoring(scoring: str, directory: pathlib.Path) -> None:
     """
+    Store the name of the way features contribute to linear model scores
 
-    :param encodings:
-    :return:
+    Args:
+        scoring: Scoring name
+        directory: Directory with model resources
     """
-    weights = {}
-    for encoding in encodings:
-        weights[encoding] = _unpack(WEIGHT_DIRECTORY / f'{encoding}.gzip', pattern='>e')
-    return weights
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / SCORING_FILE).write_text(f'{scoring}\n')
+
+
+def stat_resources(path: pathlib.Path) -> Tuple[Tuple[str, int, int], ...]:
+    """
+    Get modification times and sizes of model resources, that change
+    when resources are rewritten, without reading them
+
+    Args:
+        path: Directory with model resources, or model file created by `Model.dump`
+
+    Returns:
+        Name, modification time in nanoseconds and size of each resource file
+    """
+    stamps = []
+    for file in _list_files(path):
+        stat = file.stat()
+        stamps.append((file.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+
+def checksum_resources(resources: Mapping[str, Any]) -> str:
+    """
+    Compute SHA-256 checksum of model resources that are already read,
+    e.g. to validate exactly the contents that a model is loaded from
+
+    Args:
+        resources: Contents of model resource files, see `read_resources`,
+            or `{'.': contents}` of a model file, any objects supporting
+            buffer protocol
+
+    Returns:
+        Hexadecimal checksum, the same as `compute_checksum` of resource files
+    """
+    digest = hashlib.sha256()
+    for name, data in resources.items():
+        digest.update(f'{name}\0'.encode())
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def compute_checksum(path: pathlib.Path = RESOURCE_DIRECTORY) -> str:
+    """
+    Compute SHA-256 checksum of model resources, e.g. to validate them before loading
+
+    Args:
+        path: Directory with model resources, or model file created by `Model.dump`
+
+    Returns:
+        Hexadecimal checksum
+    """
+    if path.is_dir():
+        return checksum_resources(read_resources(path))
+
+    digest = hashlib.sha256(b'.\0')  # Model file is named relative to itself
+    with path.open('rb') as data:
+        for chunk in iter(functools.partial(data.read, 1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,240 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import array
+import enum
+import itertools
+from typing import Dict, List, Mapping, NamedTuple, Sequence, Tuple
+
+from charamel.encoding import Encoding
+
+FEATURE_SPACE = 256 * 256
+UNKNOWN_FEATURE = -1
+
+
+@enum.unique
+class Scoring(str, enum.Enum):
+    """
+    How byte n-gram features of content contribute to encoding scores
+    """
+
+    PRESENCE = 'presence'  # Each distinct n-gram adds its weight once
+    FREQUENCY = 'frequency'  # Each n-gram adds its weight times its relative count
+
+
+class SparseWeights(NamedTuple):
+    """
+    Weight matrix in compressed sparse row format, with a row for each feature
+    and a column for each encoding; only non-negligible weights are stored
+
+    Weights of row `i` are `values[offsets[i]:offsets[i + 1]]`, and their
+    columns are `columns[offsets[i]:offsets[i + 1]]`
+    """
+
+    offsets: Sequence[int]
+    columns: Sequence[int]
+    values: Sequence[float]
+    width: int
+
+    @classmethod
+    def from_dense(
+        cls, vectors: Sequence[Sequence[float]], size: int, threshold: float = 0.0
+    ) -> 'SparseWeights':
+        """
+        Compress dense weight vectors
+
+        Args:
+            vectors: Weight vector for each column, indexed by row
+            size: Number of rows
+            threshold: Weights with absolute values not greater than threshold
+                are dropped, zero keeps all non-zero weights
+
+        Returns:
+            Sparse weight matrix
+        """
+        if any(len(vector) != size for vector in vectors):
+            raise ValueError('Weight vectors must have a weight for each feature')
+
+        offsets = array.array('I', [0])
+        columns = array.array('H')
+        values = array.array('f')
+        indices = range(len(vectors))
+        for row in zip(*vectors):
+            significant = list(map(threshold.__lt__, map(abs, row)))
+            columns.extend(itertools.compress(indices, significant))
+            values.extend(itertools.compress(row, significant))
+            offsets.append(len(values))
+        offsets.extend(itertools.repeat(len(values), size + 1 - len(offsets)))
+        return cls(
+            offsets=offsets,
+            columns=columns,
+            values=values,
+            width=len(vectors),
+        )
+
+    def to_dense(self) -> List[List[float]]:
+        """
+        Decompress weight matrix
+
+        Returns:
+            Weight vector for each column, indexed by row
+        """
+        size = len(self.offsets) - 1
+        vectors = [[0.0] * size for _ in range(self.width)]
+        for row in range(size):
+            start, end = self.offsets[row], self.offsets[row + 1]
+            for column, value in zip(self.columns[start:end], self.values[start:end]):
+                vectors[column][row] = value
+        return vectors
+
+    def select(
+        self, columns: Sequence[int], threshold: float = 0.0
+    ) -> Tuple['SparseWeights', List[int]]:
+        """
+        Keep only weights of given columns that are greater than threshold
+        in absolute value, and drop rows that have no weights left
+
+        Args:
+            columns: Columns to keep, in their new order
+            threshold: Weights with absolute values not greater than threshold
+                are dropped
+
+        Returns:
+            Sparse weight matrix and indices of kept rows in this matrix
+        """
+        positions = {column: position for position, column in enumerate(columns)}
+        offsets = array.array('I', [0])
+        kept_columns = array.array('H')
+        kept_values = array.array('f')
+        rows = []
+        for row in range(len(self.offsets) - 1):
+            start, end = self.offsets[row], self.offsets[row + 1]
+            count = len(kept_values)
+            for column, value in zip(self.columns[start:end], self.values[start:end]):
+                if column in positions and abs(value) > threshold:
+                    kept_columns.append(positions[column])
+                    kept_values.append(value)
+            if len(kept_values) > count:
+                offsets.append(len(kept_values))
+                rows.append(row)
+        matrix = SparseWeights(offsets, kept_columns, kept_values, len(columns))
+        return matrix, rows
+
+
+class ScoreAccumulator:
+    """
+    Encoding scores of a multiset of features that is updated incrementally
+
+    With presence scoring, weights of a feature are applied when its count
+    becomes non-zero and withdrawn when it drops back to zero. With frequency
+    scoring, every occurrence is counted and scores are normalized by the total
+    number of features in the multiset
+    """
+
+    def __init__(
+        self,
+        lookup: Sequence[int],
+        weights: SparseWeights,
+        columns: Mapping[Encoding, int],
+        biases: Mapping[Encoding, float],
+        scoring: Scoring = Scoring.PRESENCE,
+    ):
+        self._lookup = lookup
+        self._weights = weights
+        self._biases = [
+            (encoding, bias, columns[encoding]) for encoding, bias in biases.items()
+        ]
+        self._sums = [0.0] * weights.width
+        self._counts: Dict[int, int] = {}
+        self._frequency = scoring is Scoring.FREQUENCY
+        self._total = 0
+
+    @property
+    def scores(self) -> Dict[Encoding, float]:
+        """
+        Real-valued score for each encoding
+        """
+        scale = 1 / self._total if self._frequency and self._total else 1.0
+        sums = self._sums
+        return {
+            encoding: bias + scale * sums[column]
+            for encoding, bias, column in self._biases
+        }
+
+    def _update(self, row: int, sign: float) -> None:
+        offsets, columns, values, _ = self._weights
+        start, end = offsets[row], offsets[row + 1]
+        sums = self._sums
+        for column, value in zip(columns[start:end], values[start:end]):
+            sums[column] += sign * value
+
+    def add(self, feature: int, count: int = 1) -> None:
+        """
+        Add occurrences of given feature
+
+        Args:
+            feature: Byte n-gram feature, unknown features are ignored
+            count: Number of occurrences to add
+        """
+        if count < 1:
+            return
+
+        self._total += count
+        row = self._lookup[feature]
+        if row != UNKNOWN_FEATURE:
+            previous = self._counts.get(row, 0)
+            self._counts[row] = previous + count
+            if self._frequency:
+                self._update(row, float(count))
+            elif not previous:
+                self._update(row, 1.0)
+
+    def remove(self, feature: int) -> None:
+        """
+        Remove one occurrence of given feature, that was previously added
+
+        Args:
+            feature: Byte n-gram feature, unknown features are ignored
+        """
+        self._total -= 1
+        row = self._lookup[feature]
+        if row != UNKNOWN_FEATURE:
+            count = self._counts[row] - 1
+            if count:
+                self._counts[row] = count
+            else:
+                del self._counts[row]
+            if self._frequency or not count:
+                self._update(row, -1.0)
+
+    def slide(
+        self, content: memoryview, window: Tuple[int, int], target: Tuple[int, int]
+    ) -> Tuple[int, int]:
+        """
+        Move window of content, whose byte uni-grams and bi-grams are counted,
+        forward: features of bytes that enter the window are added and features
+        of bytes that leave it are removed
+
+        Args:
+            content: Memory view of unsigned bytes
+            window: Start and end of bytes that are currently counted
+            target: Start and end of bytes to count, clipped to content;
+                window edges never move backwards
+
+        Returns:
+            Start and end of bytes that are counted after the move
+        """
+        low, high = window
+        start, end = max(low, target[0]), max(high, min(target[1], len(content)))
+        for position in range(high, end):
+            self.add(content[position])
+            if position > low:
+                self.add(content[position - 1] * 256 + content[position])
+        for position in range(low, start):
+            self.remove(content[position])
+            if position + 1 < end:
+                self.remove(content[position] * 256 + content[position + 1])
+        return start, end
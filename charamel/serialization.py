@@ -0,0 +1,159 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import array
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from charamel.encoding import Encoding
+from charamel.features import Buffer
+from charamel.scoring import FEATURE_SPACE, Scoring, SparseWeights
+
+_MAGIC = b'CHRM'
+_FORMAT_VERSION = 2
+_PREFIX = struct.Struct('<4sH')
+_HEADER = struct.Struct('<4sHHIIB7x')
+_NAME = struct.Struct('16s')
+
+
+class ModelArrays(NamedTuple):
+    """
+    Parameters of a model, with a weight matrix column for each encoding
+    in order of biases
+    """
+
+    features: Sequence[int]
+    lookup: Sequence[int]
+    matrix: SparseWeights
+    biases: Dict[Encoding, float]
+    scoring: Scoring
+
+
+def _cast(view: memoryview, typecode: str) -> Sequence:
+    """
+    Interpret little-endian bytes as values of given type, without copying if possible
+    """
+    if sys.byteorder == 'little':
+        return view.cast(typecode)  # type: ignore  # Typecode is not a literal
+    values = array.array(typecode)
+    values.frombytes(view)
+    values.byteswap()
+    return values
+
+
+def _to_little_endian(typecode: str, values: Iterable) -> bytes:
+    """
+    Serialize values of given type as little-endian bytes
+    """
+    packed = array.array(typecode, values)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def pack_model(arrays: ModelArrays) -> bytes:
+    """
+    Serialize model parameters into a single binary blob, that is laid out
+    so that `unpack_model` can use it in place
+
+    Args:
+        arrays: Model parameters
+
+    Returns:
+        Binary model representation
+    """
+    offsets, columns, values, width = arrays.matrix
+    size, count = len(arrays.features), len(values)
+    frequency = arrays.scoring is Scoring.FREQUENCY
+    chunks = [_HEADER.pack(_MAGIC, _FORMAT_VERSION, width, size, count, frequency)]
+    chunks.extend(_NAME.pack(encoding.value.encode()) for encoding in arrays.biases)
+    chunks.append(_to_little_endian('d', arrays.biases.values()))
+    chunks.append(_to_little_endian('i', arrays.lookup))
+    chunks.append(_to_little_endian('H', arrays.features))
+    chunks.append(bytes(2 * (size % 2)))
+    chunks.append(_to_little_endian('I', offsets))
+    chunks.append(_to_little_endian('H', columns))
+    chunks.append(bytes(2 * (count % 2)))
+    chunks.append(_to_little_endian('f', values))
+    return b''.join(chunks)
+
+
+def _read_header(view: memoryview) -> Tuple[int, int, int, bool]:
+    """
+    Read number of encodings, features and weights, and scoring of serialized model
+    """
+    if len(view) < _PREFIX.size:
+        raise ValueError('Not a serialized model')
+
+    magic, version = _PREFIX.unpack_from(view)
+    if magic != _MAGIC:
+        raise ValueError('Not a serialized model')
+
+    if version != _FORMAT_VERSION:
+        raise ValueError(f'Unsupported model format version: {version}')
+
+    if len(view) < _HEADER.size:
+        raise ValueError('Serialized model is corrupted')
+
+    _, _, width, size, count, frequency = _HEADER.unpack_from(view)
+    return width, size, count, bool(frequency)
+
+
+def _iter_sections(
+    view: memoryview, offset: int, layout: List[Tuple[str, int, int]]
+) -> Iterator[Sequence]:
+    """
+    Read arrays of given typecodes and lengths, each followed by given padding
+    """
+    expected = offset + sum(
+        length * struct.calcsize(typecode) + padding
+        for typecode, length, padding in layout
+    )
+    if len(view) != expected:
+        raise ValueError('Serialized model is corrupted')
+
+    for typecode, length, padding in layout:
+        end = offset + length * struct.calcsize(typecode)
+        yield _cast(view[offset:end], typecode)
+        offset = end + padding
+
+
+def unpack_model(data: Buffer) -> ModelArrays:
+    """
+    Deserialize model parameters from binary blob created by `pack_model`,
+    arrays are not copied but reference given buffer
+
+    Args:
+        data: Binary model representation, any object supporting buffer protocol
+
+    Returns:
+        Model parameters
+    """
+    view = memoryview(data).cast('B')
+    width, size, count, frequency = _read_header(view)
+    layout = [
+        ('d', width, 0),
+        ('i', FEATURE_SPACE, 0),
+        ('H', size, 2 * (size % 2)),
+        ('I', size + 1, 0),
+        ('H', count, 2 * (count % 2)),
+        ('f', count, 0),
+    ]
+    names = view[_HEADER.size : _HEADER.size + width * _NAME.size]
+    biases, lookup, features, offsets, columns, values = _iter_sections(
+        view, _HEADER.size + width * _NAME.size, layout
+    )
+    encodings = [
+        Encoding(name.rstrip(b'\0').decode()) for (name,) in _NAME.iter_unpack(names)
+    ]
+    return ModelArrays(
+        features=features,
+        lookup=lookup,
+        matrix=SparseWeights(offsets, columns, values, width),
+        biases=dict(zip(encodings, biases)),
+        scoring=Scoring.FREQUENCY if frequency else Scoring.PRESENCE,
+    )
@@ -0,0 +1,234 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import os
+import struct
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory  # Python 3.8+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from charamel.model import Model
+
+_MAGIC = b'CHRS'
+_CONTROL = struct.Struct('<4sIQQQ')  # Magic, sequence, server, version, model size
+_ATTEMPTS = 100
+
+_LOCK = threading.Lock()
+_ATTACHED: Dict[str, Tuple[Tuple[int, int], 'SharedModel', '_Segment']] = {}
+_CONTROLS: Dict[str, '_Segment'] = {}
+
+
+class _Segment(shared_memory.SharedMemory):
+    """
+    Shared memory segment that stays mapped while models reference it
+    """
+
+    # Attributes of `SharedMemory` that are not in its public interface
+    _name: str
+    _fd: int
+
+    def __init__(self, name: str, create: bool = False, size: int = 0):
+        if sys.version_info >= (3, 13):
+            # pylint: disable=unexpected-keyword-arg  # Added in Python 3.13
+            super().__init__(name, create, size, track=create)
+            return
+
+        super().__init__(name, create, size)
+        if not create and self._tracked:
+            # Attached segments are owned by the publisher, they must not be
+            # unlinked when this process exits
+            resource_tracker.unregister(self._name, 'shared_memory')
+
+    @property
+    def _tracked(self) -> bool:
+        """
+        Check if segment is registered with resource tracker (Python < 3.13)
+        """
+        return os.name == 'posix' and sys.version_info < (3, 13)
+
+    @property
+    def view(self) -> memoryview:
+        """
+        Mapped memory of segment, available until segment is closed
+        """
+        buffer = self.buf
+        if buffer is None:
+            raise ValueError(f'Shared memory segment is closed: {self.name}')
+        return buffer
+
+    def unlink(self) -> None:
+        if self._tracked:
+            # Resource tracker may be shared with processes that attached to segment
+            # and unregistered it, register it again so that unlinking is tracked
+            resource_tracker.register(self._name, 'shared_memory')
+        super().unlink()
+
+    def close(self) -> None:
+        try:
+            super().close()
+        except BufferError:
+            # Mapping is released once models that reference it are collected
+            if getattr(self, '_fd', -1) >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+
+class SharedModel(NamedTuple):
+    """
+    Model published into shared memory
+    """
+
+    version: int
+    model: Model
+
+
+def _get_segment_name(name: str, version: int) -> str:
+    """
+    Get name of shared memory segment that stores given model version
+    """
+    return f'{name}-{version}'
+
+
+class ModelServer:
+    """
+    Publisher of models into named shared memory, so that other processes
+    on the host use a single copy of weights instead of loading their own
+
+    A small control segment named after the server stores the current model
+    version, while each version is stored in its own segment. Publishing
+    a new version swaps the control record and unlinks the previous segment,
+    whose memory is freed once all processes that use it pick up the new one
+    """
+
+    def __init__(self, name: str):
+        """
+        Create model server, there can be only one server with a given name
+
+        Args:
+            name: Name of shared memory control segment, e.g. `charamel`
+        """
+        self._name = name
+        self._control = _Segment(name, create=True, size=_CONTROL.size)
+        # Versions start from one again after restart, the random server
+        # identifier tells them apart from versions of the previous server
+        self._server = int.from_bytes(os.urandom(8), 'little')
+        _CONTROL.pack_into(self._control.view, 0, _MAGIC, 0, self._server, 0, 0)
+        self._segment: Optional[_Segment] = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """
+        Version of the most recently published model, zero if none was published
+        """
+        return self._version
+
+    def publish(self, model: Model) -> int:
+        """
+        Publish model as a new version, processes attach to it with `attach`
+
+        Args:
+            model: Model to publish, e.g. loaded with `Model.load`
+
+        Returns:
+            Published model version
+        """
+        blob = model.to_bytes()
+        version = self._version + 1
+        segment = _Segment(
+            _get_segment_name(self._name, version), create=True, size=len(blob)
+        )
+        segment.view[: len(blob)] = blob
+
+        # Odd sequence marks that the control record is being updated
+        control, server = self._control.view, self._server
+        sequence = _CONTROL.unpack_from(control)[1]
+        _CONTROL.pack_into(control, 0, _MAGIC, sequence + 1, server, version, 0)
+        _CONTROL.pack_into(control, 0, _MAGIC, sequence + 2, server, version, len(blob))
+
+        previous, self._segment, self._version = self._segment, segment, version
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+        return version
+
+    def close(self) -> None:
+        """
+        Stop publishing models, processes that are attached keep using them
+        """
+        _CONTROL.pack_into(self._control.view, 0, bytes(4), 0, 0, 0, 0)
+        for segment in self._segment, self._control:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+        self._segment = None
+
+    def __enter__(self) -> 'ModelServer':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _read_control(name: str) -> Tuple[int, int, int]:
+    """
+    Read consistent server identifier, version and size of the current model
+    from control segment
+    """
+    control = _CONTROLS.get(name)
+    if control is None or _CONTROL.unpack_from(control.view)[0] != _MAGIC:
+        # Server may have been restarted, with a new control segment
+        control = _CONTROLS[name] = _Segment(name)
+
+    for _ in range(_ATTEMPTS):
+        magic, sequence, server, version, size = _CONTROL.unpack_from(control.view)
+        if magic != _MAGIC:
+            raise ValueError(f'Not a model server: {name}')
+
+        if not sequence % 2 and _CONTROL.unpack_from(control.view)[1] == sequence:
+            return server, version, size
+    raise RuntimeError(f'Model server is not responding: {name}')
+
+
+def attach(name: str) -> SharedModel:
+    """
+    Get the current model published by server, without copying its weights
+
+    Models are cached for each process, so attaching again is almost free
+    unless a new version was published
+
+    Args:
+        name: Name of model server
+
+    Returns:
+        Current model with its version
+
+    Example:
+        >>> server = ModelServer('charamel')  # In the master process
+        >>> server.publish(Model.load())
+        >>> detector = Detector.from_model(attach('charamel').model)  # In workers
+    """
+    with _LOCK:
+        for _ in range(_ATTEMPTS):
+            server, version, size = _read_control(name)
+            if not version:
+                raise ValueError(f'No model is published: {name}')
+
+            cached = _ATTACHED.get(name)
+            if cached is not None and cached[0] == (server, version):
+                return cached[1]
+
+            try:
+                segment = _Segment(_get_segment_name(name, version))
+            except FileNotFoundError:  # Newer version is being published
+                continue
+
+            model = Model.from_bytes(segment.view[:size].toreadonly())
+            shared = SharedModel(version, model)
+            _ATTACHED[name] = (server, version), shared, segment
+            return shared
+    raise RuntimeError(f'Model server is not responding: {name}')
@@ -0,0 +1,252 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import collections
+import concurrent.futures
+import math
+import pathlib
+import random
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from charamel.encoding import Encoding
+from charamel.features import _get_feature_counts, _get_features
+from charamel.model import Model
+from charamel.scoring import Scoring
+
+Sample = List[Tuple[int, float]]
+
+_SAMPLES: List[Sample] = []
+_LABELS: List[Encoding] = []
+
+
+class Parameters(NamedTuple):
+    """
+    Parameters of L1-regularized logistic regression training
+    """
+
+    l1: float = 1e-4
+    epochs: int = 10
+    learning_rate: float = 0.5
+    decay: float = 0.85
+    seed: int = 0
+    min_count: int = 2  # Minimum number of files a feature must occur in to be used
+
+
+def iter_corpus(directory: pathlib.Path) -> Iterator[Tuple[pathlib.Path, Encoding]]:
+    """
+    Iterate over training corpus, where each encoding has its own sub-directory,
+    e.g. `utf_8/*`, `cp1251/*`; sub-directories that are not named after
+    encodings, such as `__pycache__`, are skipped
+
+    Args:
+        directory: Corpus directory
+
+    Returns:
+        Iterator over file paths and their corresponding encodings
+    """
+    for subdirectory in sorted(directory.iterdir()):
+        try:
+            encoding = Encoding(subdirectory.name)
+        except ValueError:
+            continue
+
+        for path in sorted(subdirectory.glob('**/*')):
+            if path.is_file():
+                yield path, encoding
+
+
+def _extract(task: Tuple[pathlib.Path, Scoring]) -> Dict[int, float]:
+    """
+    Read file and extract its byte n-gram features
+    """
+    path, scoring = task
+    content = path.read_bytes()
+    if scoring is Scoring.FREQUENCY:
+        return _get_feature_counts(content)
+    return dict.fromkeys(_get_features(content), 1.0)
+
+
+def extract_features(
+    paths: Iterable[pathlib.Path],
+    scoring: Scoring = Scoring.PRESENCE,
+    workers: Optional[int] = None,
+) -> Iterator[Dict[int, float]]:
+    """
+    Extract byte n-gram features of files in parallel, streaming results in order
+
+    Args:
+        paths: Files to extract features from
+        scoring: How features of content contribute to scores
+        workers: Number of processes, defaults to number of CPUs, 1 disables
+            multiprocessing
+
+    Returns:
+        Iterator over mappings from features to their values
+    """
+    tasks = ((path, scoring) for path in paths)
+    if workers == 1:
+        yield from map(_extract, tasks)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(_extract, tasks, chunksize=16)
+
+
+def _initialize(samples: List[Sample], labels: List[Encoding]) -> None:
+    """
+    Share training set with worker process
+    """
+    global _SAMPLES, _LABELS  # pylint: disable=global-statement
+    _SAMPLES, _LABELS = samples, labels
+
+
+def _predict(weights: List[float], bias: float, sample: Sample) -> float:
+    """
+    Compute probability that sample belongs to the positive encoding
+    """
+    margin = bias + sum(weights[index] * value for index, value in sample)
+    margin = min(max(margin, -30.0), 30.0)
+    return 1 / (1 + math.exp(-margin))
+
+
+def _update(
+    weights: List[float],
+    penalties: List[float],
+    sample: Sample,
+    step: float,
+    total_penalty: float,
+) -> None:
+    """
+    Move weights of sample features by gradient step, then apply the part of
+    cumulative L1 penalty that each weight has not received yet, clipping
+    weights at zero instead of letting the penalty flip their signs
+    """
+    for index, value in sample:
+        weight = weights[index] + step * value
+        applied = penalties[index]
+        if weight > 0.0:
+            clipped = max(0.0, weight - (total_penalty + applied))
+        elif weight < 0.0:
+            clipped = min(0.0, weight + (total_penalty - applied))
+        else:
+            clipped = weight
+        penalties[index] = applied + clipped - weight
+        weights[index] = clipped
+
+
+def _fit(task: Tuple[Encoding, int, Parameters]) -> Tuple[List[float], float]:
+    """
+    Fit one-vs-rest logistic regression for given encoding using SGD with
+    cumulative L1 penalty (Tsuruoka et al., 2009), that keeps weights sparse
+
+    Args:
+        task: Positive encoding, number of features and training parameters
+
+    Returns:
+        Weights and bias of binary classifier
+    """
+    encoding, size, parameters = task
+    weights = [0.0] * size
+    penalties = [0.0] * size
+    bias = 0.0
+    total_penalty = 0.0
+    order = list(range(len(_SAMPLES)))
+    shuffle = random.Random(parameters.seed).shuffle
+    for epoch in range(parameters.epochs):
+        rate = parameters.learning_rate * parameters.decay**epoch
+        shuffle(order)
+        for position in order:
+            sample = _SAMPLES[position]
+            total_penalty += rate * parameters.l1
+            gradient = float(_LABELS[position] is encoding)
+            gradient -= _predict(weights, bias, sample)
+            bias += rate * gradient
+            _update(weights, penalties, sample, rate * gradient, total_penalty)
+    return weights, bias
+
+
+def _fit_all(
+    tasks: List[Tuple[Encoding, int, Parameters]],
+    samples: List[Sample],
+    labels: List[Encoding],
+    workers: Optional[int],
+) -> List[Tuple[List[float], float]]:
+    """
+    Fit binary classifiers in worker processes, that receive training set once
+    """
+    if workers != 1:
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_initialize, initargs=(samples, labels)
+        ) as executor:
+            return list(executor.map(_fit, tasks))
+
+    _initialize(samples, labels)
+    try:
+        return list(map(_fit, tasks))
+    finally:
+        _initialize([], [])
+
+
+def _index_features(
+    documents: List[Dict[int, float]], min_count: int
+) -> Dict[int, int]:
+    """
+    Index features that occur in at least `min_count` documents, in sorted order
+    """
+    counts = collections.Counter(feature for doc in documents for feature in doc)
+    features = sorted(f for f, count in counts.items() if count >= min_count)
+    return {feature: index for index, feature in enumerate(features)}
+
+
+def train(
+    directory: pathlib.Path,
+    encodings: Optional[Iterable[Encoding]] = None,
+    scoring: Scoring = Scoring.PRESENCE,
+    parameters: Parameters = Parameters(),
+    workers: Optional[int] = None,
+) -> Model:
+    """
+    Train linear encoding detection model on a corpus of encoded files
+
+    Args:
+        directory: Corpus directory, see `iter_corpus`
+        encodings: Encodings to train the model for, defaults to all corpus encodings;
+            files in other encodings are still used as negative examples
+        scoring: How features of content contribute to scores
+        parameters: Parameters of L1-regularized logistic regression,
+            larger `l1` leads to smaller models
+        workers: Number of processes, defaults to number of CPUs, 1 disables
+            multiprocessing
+
+    Returns:
+        Trained model without features that have zero weights for all encodings
+
+    Example:
+        >>> model = train(pathlib.Path('corpus'), parameters=Parameters(l1=1e-3))
+        >>> model.save(pathlib.Path('model'))
+    """
+    corpus = list(iter_corpus(directory))
+    if not corpus:
+        raise ValueError(f'No files found in corpus: {directory}')
+
+    labels = [encoding for _, encoding in corpus]
+    encodings = list(dict.fromkeys(labels if encodings is None else encodings))
+    documents = list(extract_features((path for path, _ in corpus), scoring, workers))
+
+    indices = _index_features(documents, parameters.min_count)
+    samples = [
+        [(indices[f], value) for f, value in document.items() if f in indices]
+        for document in documents
+    ]
+    tasks = [(encoding, len(indices), parameters) for encoding in encodings]
+    weights, biases = zip(*_fit_all(tasks, samples, labels, workers))
+    model = Model(
+        features=indices,
+        weights=dict(zip(encodings, weights)),
+        biases=dict(zip(encodings, biases)),
+        scoring=scoring,
+    )
+    return model.compile(encodings)
@@ -0,0 +1,208 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import codecs
+import functools
+import operator
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from charamel.encoding import Encoding
+from charamel.scoring import FEATURE_SPACE
+
+_MAX_STATES = 4096  # Prefixes to explore before giving up on an encoding
+
+
+class _StatefulEncoding(Exception):
+    """
+    Decoder changes its state between characters, e.g. on escape sequences,
+    so validity of bytes depends on what precedes them
+    """
+
+
+class _Decoder:
+    """
+    Classifier of byte sequences by how incremental decoder handles them
+    """
+
+    def __init__(self, encoding: Encoding):
+        self._decoder = codecs.getincrementaldecoder(encoding.value)()
+        _, self._initial = self._decoder.getstate()
+
+    def classify(self, data: bytes) -> Optional[bool]:
+        """
+        Decode sequence from a character boundary
+
+        Args:
+            data: Byte sequence
+
+        Returns:
+            `None` if sequence is invalid, `True` if it ends on a character
+            boundary, `False` if its last character is incomplete
+        """
+        self._decoder.reset()
+        try:
+            self._decoder.decode(data)
+        except UnicodeDecodeError:
+            return None
+        except UnicodeError as error:  # E.g. UTF-16 stream without byte order mark
+            raise _StatefulEncoding from error
+
+        buffered, state = self._decoder.getstate()
+        if state != self._initial:
+            raise _StatefulEncoding
+        return not buffered
+
+
+Signature = Tuple[bytes, bytes]  # Bytes that are valid and incomplete after a prefix
+
+
+def _get_signature(labels: List[Optional[bool]]) -> Signature:
+    """
+    Identify decoder state by bytes that it accepts, see `_Decoder.classify`
+    """
+    return (
+        bytes(byte for byte, label in enumerate(labels) if label is not None),
+        bytes(byte for byte, label in enumerate(labels) if label is False),
+    )
+
+
+def _explore(
+    decoder: _Decoder, prefixes: List[bytes], signatures: Set[Signature]
+) -> Set[int]:
+    """
+    Find bytes that continue incomplete characters, children of prefixes
+    that lead to the same decoder state are explored only once
+
+    Args:
+        decoder: Byte sequence classifier
+        prefixes: Incomplete characters to start from
+        signatures: Decoder states that are already explored
+
+    Returns:
+        Bytes that are valid at non-initial positions of characters
+    """
+    continuations: Set[int] = set()
+    for _ in range(_MAX_STATES):
+        if not prefixes:
+            return continuations
+
+        prefix = prefixes.pop()
+        labels = [decoder.classify(prefix + bytes((byte,))) for byte in range(256)]
+        valid, incomplete = signature = _get_signature(labels)
+        continuations.update(valid)
+        if signature not in signatures:
+            signatures.add(signature)
+            prefixes.extend(prefix + bytes((byte,)) for byte in incomplete)
+    raise _StatefulEncoding
+
+
+@functools.lru_cache(maxsize=None)
+def get_invalid_features(encoding: Encoding) -> FrozenSet[int]:
+    """
+    Find byte uni-grams and bi-grams that never occur in content encoded
+    with given encoding, according to its Python codec
+
+    Bi-grams are only checked if their first byte always starts a character,
+    so that the check does not depend on preceding bytes. Validity of bytes
+    in encodings that switch decoder states, e.g. ISO-2022 and UTF-16 with BOM,
+    depends on the state, so they have no invalid features
+
+    Args:
+        encoding: Encoding to compute features for, computed once per process
+
+    Returns:
+        Byte n-gram features, bi-grams that start with zero byte are omitted
+        as they share features with uni-grams
+    """
+    decoder = _Decoder(encoding)
+    try:
+        starts = [decoder.classify(bytes((byte,))) for byte in range(256)]
+        pairs: Dict[int, List[Optional[bool]]] = {}
+        continuations: Set[int] = set()
+        prefixes: List[bytes] = []
+        signatures: Set[Signature] = set()
+        for lead, label in enumerate(starts):
+            if label is not False:
+                continue
+
+            pairs[lead] = [decoder.classify(bytes((lead, x))) for x in range(256)]
+            valid, incomplete = signature = _get_signature(pairs[lead])
+            continuations.update(valid)
+            if len(continuations) == 256:  # Any byte may follow any other one
+                return frozenset()
+
+            if signature not in signatures:
+                signatures.add(signature)
+                prefixes.extend(bytes((lead, byte)) for byte in incomplete)
+        continuations.update(_explore(decoder, prefixes, signatures))
+    except _StatefulEncoding:
+        return frozenset()
+
+    invalid = {
+        byte
+        for byte, label in enumerate(starts)
+        if label is None and byte not in continuations
+    }
+    # Continuations that are invalid at character boundaries, i.e. after
+    # complete characters
+    orphans = [
+        byte
+        for byte, label in enumerate(starts)
+        if label is None and byte in continuations
+    ]
+    for first in range(1, 256):
+        if first in continuations or first in invalid:
+            continue
+
+        if starts[first]:
+            invalid.update(first * 256 + second for second in orphans)
+        else:
+            invalid.update(
+                first * 256 + second
+                for second, label in enumerate(pairs[first])
+                if label is None and second not in invalid
+            )
+    return frozenset(invalid)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_exclusions(encodings: Tuple[Encoding, ...]) -> List[int]:
+    """
+    Map each feature to a bit mask of encodings that it rules out,
+    bits are positions of encodings in given sequence
+    """
+    exclusions = [0] * FEATURE_SPACE
+    for position, encoding in enumerate(encodings):
+        for feature in get_invalid_features(encoding):
+            exclusions[feature] |= 1 << position
+    return exclusions
+
+
+def exclude_invalid(
+    scores: Dict[Encoding, float], features: Iterable[int]
+) -> Dict[Encoding, float]:
+    """
+    Drop scores of encodings that are unable to decode content with given
+    features, unless none of the encodings is able to decode it
+
+    Args:
+        scores: Real-valued score for each encoding
+        features: Byte n-gram features of content
+
+    Returns:
+        Scores of encodings that are able to decode content
+    """
+    encodings = tuple(scores)
+    exclusions = _get_exclusions(encodings)
+    mask = functools.reduce(operator.or_, map(exclusions.__getitem__, features), 0)
+    if not mask or mask == (1 << len(encodings)) - 1:
+        return scores
+
+    return {
+        encoding: score
+        for position, (encoding, score) in enumerate(scores.items())
+        if not mask >> position & 1
+    }
@@ -4,12 +4,14 @@
 
 Licensed under Apache 2.0
 """
+import argparse
 import collections
 import logging
+import pathlib
 import sys
 import time
 import warnings
-from typing import Any, Dict, Iterator, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import cchardet
 import chardet
@@ -27,6 +29,7 @@ DOUBLE_LINE = termcolor.colored('=' * 80, 'blue')
 TOTAL = 'Total'
 ASTERISK = ' *'
 TIME_PERCENTILE = 0.99
+PREFIX_SIZES = (64, 256, 1024, 4096, None)
 
 
 def _format_percent(count: float, total: float) -> str:
@@ -357,6 +360,83 @@ def _create_detector_metrics(
     return tabulate.tabulate(breakdown, METRIC_HEADERS, tablefmt='github')
 
 
+def _create_prefix_accuracy(
+    detectors: Dict[str, Callable[[bytes], Any]], samples: List[Tuple[bytes, str]]
+) -> str:
+    headers = ['Detector', *(f'{s} Bytes' if s else 'Full File' for s in PREFIX_SIZES)]
+    breakdown = []
+
+    for detector, detect in detectors.items():
+        hits: Dict[Optional[int], int] = collections.Counter()
+        for content, expected in samples:
+            for size in PREFIX_SIZES:
+                detected = detect(content[:size])
+                hits[size] += is_correct_encoding(content, detected, expected)
+        breakdown.append(
+            [
+                detector,
+                *(_format_percent(hits[size], len(samples)) for size in PREFIX_SIZES),
+            ]
+        )
+
+    return tabulate.tabulate(breakdown, headers, tablefmt='github')
+
+
+def _get_charamel_detectors(
+    frequency_model: Optional[pathlib.Path],
+) -> Dict[str, Callable[[bytes], Any]]:
+    detectors = {f'{CHARAMEL} (Presence)': DETECTORS[CHARAMEL]}
+    if frequency_model is not None:
+        model = charamel.Model.open(frequency_model)
+        detector = charamel.Detector.from_model(model)
+        detectors[f'{CHARAMEL} ({model.scoring.value.capitalize()})'] = detector.detect
+    return detectors
+
+
+def _create_threshold_impact(
+    thresholds: List[float], samples: List[Tuple[bytes, str]]
+) -> str:
+    headers = ['Threshold', 'Stored Weights', 'Accuracy', 'Mean Time']
+    rows = []
+    for threshold in thresholds:
+        model = charamel.Model.load(threshold=threshold)
+        detector = charamel.Detector.from_model(model)
+        hits = 0
+        start = time.time()
+        for content, expected in samples:
+            detected = detector.detect(content)
+            hits += is_correct_encoding(content, detected, expected)
+        elapsed = time.time() - start
+        rows.append(
+            [
+                threshold,
+                model.nonzeros,
+                _format_percent(hits, len(samples)),
+                f'{elapsed / len(samples) * 1000:.2f} ms',
+            ]
+        )
+    return tabulate.tabulate(rows, headers, tablefmt='github')
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Encoding detector benchmark')
+    parser.add_argument(
+        '--frequency-model',
+        type=pathlib.Path,
+        help='Model file created by `Model.dump` to compare with the bundled model '
+        'in accuracy on content prefixes, e.g. a model with frequency scoring',
+    )
+    parser.add_argument(
+        '--thresholds',
+        type=float,
+        nargs='*',
+        default=[0.0, 0.01, 0.05, 0.1],
+        help='Thresholds below which weights of the bundled model are not stored, '
+        'to measure their impact on model size, accuracy and speed',
+    )
+    return parser.parse_args()
+
+
 def _run_detectors(content: bytes, expected: str) -> Iterator[Tuple[str, float, bool]]:
     for detector, detect in DETECTORS.items():
         start = time.time()
@@ -365,10 +445,19 @@ def _run_detectors(content: bytes, expected: str) -> Iterator[Tuple[str, float,
         yield detector, end - start, is_correct_encoding(content, detected, expected)
 
 
+def _log_table(table: str, title: Optional[str] = None) -> None:
+    LOGGER.info(DOUBLE_LINE)
+    if title is not None:
+        LOGGER.info(title)
+    for line in table.splitlines():
+        LOGGER.info(line)
+
+
 def main():
     """
     Run benchmark on all test fixtures
     """
+    args = _parse_args()
     logging.basicConfig(format='%(message)s', level=logging.INFO, stream=sys.stdout)
     warnings.simplefilter('ignore', UserWarning)
 
@@ -378,6 +467,7 @@ def main():
 
     fixtures = list(iter_fixtures())
     sizes = []
+    samples = []
     times = collections.defaultdict(list)
     hits = collections.defaultdict(collections.Counter)
     for i, (path, encoding) in enumerate(fixtures, start=1):
@@ -385,22 +475,24 @@ def main():
         content = path.read_bytes()
         sizes.append(len(content))
         expected = content.decode(encoding)
+        samples.append((content, expected))
         for detector, elapsed, is_correct in _run_detectors(content, expected):
             times[detector].append(elapsed)
             hits[encoding][detector] += is_correct
-        file_percent = termcolor.colored(
-            f'[{_format_percent(i, len(fixtures))}]', 'yellow'
-        )
-        LOGGER.info('%s %s', path, file_percent)
+        percent = _format_percent(i, len(fixtures))
+        LOGGER.info('%s %s', path, termcolor.colored(f'[{percent}]', 'yellow'))
 
-    LOGGER.info(DOUBLE_LINE)
-    for line in _create_detector_metrics(times, sizes, hits).splitlines():
-        LOGGER.info(line)
-
-    LOGGER.info(DOUBLE_LINE)
-    for line in _create_encoding_accuracy_breakdown(hits).splitlines():
-        LOGGER.info(line)
+    _log_table(_create_detector_metrics(times, sizes, hits))
+    _log_table(_create_encoding_accuracy_breakdown(hits))
     LOGGER.info('%s - not officially supported for detector', ASTERISK)
+    _log_table(
+        _create_prefix_accuracy(_get_charamel_detectors(args.frequency_model), samples),
+        title='Accuracy on content prefixes of given size',
+    )
+    _log_table(
+        _create_threshold_impact(args.thresholds, samples),
+        title='Impact of pruning negligible weights',
+    )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,161 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import pathlib
+import sys
+from typing import Any, Dict, List, Optional
+
+import tabulate
+
+import charamel
+
+LOGGER = logging.getLogger('memory')
+
+CONTENT = 'Съешь же ещё этих мягких французских булок'.encode('utf_8')
+MEMORY_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+MODES = ('lazy', 'preload', 'preload-unfrozen')
+HEADERS = [
+    'Mode',
+    'Workers',
+    'Worker RSS, MB',
+    'Worker PSS, MB',
+    'Worker Private, MB',
+    'Total PSS, MB',
+]
+
+Memory = Dict[str, float]
+
+
+def _read_memory(pid: int) -> Memory:
+    """
+    Read memory usage of process in megabytes, PSS splits shared pages
+    evenly between processes that map them (Linux only)
+    """
+    memory = {}
+    with open(f'/proc/{pid}/smaps_rollup', encoding='utf-8') as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            if name in MEMORY_FIELDS:
+                memory[name] = int(value.split()[0]) / 1024
+    memory['Private'] = memory.pop('Private_Clean') + memory.pop('Private_Dirty')
+    return memory
+
+
+def _get_pid(process: multiprocessing.process.BaseProcess) -> int:
+    """
+    Get identifier of started process
+    """
+    if process.pid is None:
+        raise RuntimeError('Process is not started')
+    return process.pid
+
+
+def _create_detector(model: Optional[pathlib.Path]) -> charamel.Detector:
+    """
+    Create detector the way a worker does, preloaded models are reused
+    """
+    if model is None:
+        return charamel.Detector()
+    return charamel.Detector.from_model(charamel.preload(source=model, freeze=False))
+
+
+def _serve(connection: Any, model: Optional[pathlib.Path]) -> None:
+    """
+    Worker that creates detector, serves a request and reports that it is ready
+    """
+    detector = _create_detector(model)
+    detector.detect(CONTENT)
+    gc.collect()  # Collections in long-running workers touch every tracked object
+    connection.send(True)
+    connection.recv()
+
+
+def _run_master(
+    connection: Any, mode: str, workers: int, model: Optional[pathlib.Path]
+) -> None:
+    """
+    Fork workers after preloading model or without it, and measure their memory
+    """
+    if mode != 'lazy':
+        charamel.preload(source=model, freeze=mode == 'preload')
+
+    context = multiprocessing.get_context('fork')
+    processes = []
+    for _ in range(workers):
+        parent, child = context.Pipe()
+        process = context.Process(target=_serve, args=(child, model))
+        process.start()
+        processes.append((process, parent))
+
+    for _, pipe in processes:
+        pipe.recv()
+    usage = [_read_memory(_get_pid(process)) for process, _ in processes]
+    master = _read_memory(os.getpid())
+
+    for process, pipe in processes:
+        pipe.send(True)
+        process.join()
+    connection.send((master, usage))
+
+
+def _measure(mode: str, workers: int, model: Optional[pathlib.Path]) -> List[Any]:
+    """
+    Run master in a fresh process, so that modes do not share caches
+    """
+    context = multiprocessing.get_context('spawn')
+    parent, child = context.Pipe()
+    process = context.Process(target=_run_master, args=(child, mode, workers, model))
+    process.start()
+    master, usage = parent.recv()
+    process.join()
+
+    def _mean(field: str) -> float:
+        return round(sum(memory[field] for memory in usage) / len(usage), 1)
+
+    total = master['Pss'] + sum(memory['Pss'] for memory in usage)
+    return [mode, workers, _mean('Rss'), _mean('Pss'), _mean('Private'), round(total)]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Measure memory of prefork workers with and without preloading'
+    )
+    parser.add_argument('--workers', type=int, default=4, help='Number of workers')
+    parser.add_argument(
+        '--model',
+        type=pathlib.Path,
+        help='Model resource directory or file created by `Model.dump`, '
+        'bundled model by default',
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Compare memory of workers that load model after fork with preloaded ones
+    """
+    args = _parse_args()
+    logging.basicConfig(format='%(message)s', level=logging.INFO, stream=sys.stdout)
+
+    rows = [_measure(mode, args.workers, args.model) for mode in MODES]
+    for line in tabulate.tabulate(rows, HEADERS, tablefmt='github').splitlines():
+        LOGGER.info(line)
+
+    lazy, preloaded, _ = rows
+    LOGGER.info('')
+    LOGGER.info(
+        'Preloading saves %.1f MB of private memory per worker',
+        lazy[4] - preloaded[4],
+    )
+
+
+if __name__ == '__main__':
+    main()
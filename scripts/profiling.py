@@ -0,0 +1,219 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import argparse
+import collections
+import cProfile
+import logging
+import pathlib
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tabulate
+
+import charamel
+from tests.fixtures import iter_fixtures
+
+LOGGER = logging.getLogger('profiling')
+
+TIME_PERCENTILE = 0.99
+SIZE_BUCKETS = (
+    (1_000, '< 1 KB'),
+    (10_000, '1-10 KB'),
+    (100_000, '10-100 KB'),
+    (1_000_000, '100 KB - 1 MB'),
+    (None, '>= 1 MB'),
+)
+HEADERS = [
+    'Files',
+    'Ms / File (Mean)',
+    f'Ms / File ({round(100 * TIME_PERCENTILE)}%)',
+    'Ms / File (Max)',
+    'KB / Sec',
+]
+
+Call = Tuple[float, pathlib.Path, bytes]
+
+
+class StackCollector:
+    """
+    Deterministic profiler that sums time spent in each call stack, in the
+    collapsed stack format that `flamegraph.pl`, speedscope and `py-spy` use
+    """
+
+    def __init__(self):
+        self.stacks: Dict[str, float] = collections.Counter()
+        self._stack: List[str] = []
+        self._last = time.perf_counter()
+
+    def _account(self, now: float) -> None:
+        if self._stack:
+            self.stacks[';'.join(self._stack)] += now - self._last
+        self._last = now
+
+    def __call__(self, frame: Any, event: str, arg: Any) -> None:
+        now = time.perf_counter()
+        if event == 'call':
+            self._account(now)
+            code = frame.f_code
+            name = pathlib.Path(code.co_filename).name
+            self._stack.append(f'{code.co_name} ({name}:{code.co_firstlineno})')
+        elif event == 'c_call':
+            self._account(now)
+            self._stack.append(getattr(arg, '__qualname__', repr(arg)))
+        elif event in ('return', 'c_return', 'c_exception'):
+            self._account(now)
+            if self._stack:
+                self._stack.pop()
+
+    def run(self, function: Callable[..., Any], *args: Any) -> None:
+        """
+        Profile a single function call
+        """
+        self._stack.clear()
+        sys.setprofile(self)
+        try:
+            function(*args)
+        finally:
+            sys.setprofile(None)
+
+    def dump(self, path: pathlib.Path) -> None:
+        """
+        Write collapsed stacks, with microseconds as sample counts
+        """
+        with path.open('w') as file:
+            for stack, seconds in sorted(self.stacks.items()):
+                microseconds = round(seconds * 1e6)
+                if microseconds:
+                    file.write(f'{stack} {microseconds}\n')
+
+
+def _get_bucket(size: int) -> str:
+    for limit, name in SIZE_BUCKETS:
+        if limit is None or size < limit:
+            return name
+    raise AssertionError('Unreachable')
+
+
+def _create_breakdown(
+    header: str, groups: Dict[str, List[Tuple[float, int]]], order: List[str]
+) -> str:
+    breakdown = []
+    for group in order:
+        times = sorted(elapsed for elapsed, _ in groups[group])
+        total_time = sum(times)
+        total_kilobytes = sum(size for _, size in groups[group]) / 1000
+        breakdown.append(
+            [
+                group,
+                len(times),
+                round(1000 * total_time / len(times), 3),
+                round(1000 * times[int(TIME_PERCENTILE * len(times))], 3),
+                round(1000 * times[-1], 3),
+                round(total_kilobytes / total_time) if total_time else '-',
+            ]
+        )
+    return tabulate.tabulate(breakdown, [header, *HEADERS], tablefmt='github')
+
+
+def _profile_slowest(
+    detect: Callable[[bytes], Any], calls: List[Call], output: pathlib.Path
+) -> None:
+    output.mkdir(parents=True, exist_ok=True)
+    profile = cProfile.Profile()
+    collector = StackCollector()
+    for elapsed, path, content in calls:
+        LOGGER.info('%s: %.3f ms, %d bytes', path, 1000 * elapsed, len(content))
+        profile.runcall(detect, content)
+        collector.run(detect, content)
+
+    profile.dump_stats(str(output / 'slowest.prof'))
+    collector.dump(output / 'slowest.folded')
+    LOGGER.info('cProfile statistics are written to %s', output / 'slowest.prof')
+    LOGGER.info(
+        'Collapsed stacks are written to %s, render them with '
+        '`flamegraph.pl %s > flamegraph.svg` or speedscope',
+        output / 'slowest.folded',
+        output / 'slowest.folded',
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Profile charamel detection by fixture encoding and input size'
+    )
+    parser.add_argument(
+        '--model', type=pathlib.Path, help='Model file created by `Model.dump`'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='Number of timed calls for each file'
+    )
+    parser.add_argument(
+        '--slowest',
+        type=int,
+        default=0,
+        help='Number of the slowest calls to profile with cProfile and stack collector',
+    )
+    parser.add_argument(
+        '--output',
+        type=pathlib.Path,
+        default=pathlib.Path('profile'),
+        help='Directory for profiles of the slowest calls',
+    )
+    return parser.parse_args()
+
+
+def _get_detector(model: Optional[pathlib.Path]) -> charamel.Detector:
+    if model is None:
+        return charamel.Detector()
+    return charamel.Detector.from_model(charamel.Model.open(model))
+
+
+def main():
+    """
+    Time detection of each test fixture and break timings down
+    """
+    args = _parse_args()
+    logging.basicConfig(format='%(message)s', level=logging.INFO, stream=sys.stdout)
+    detect = _get_detector(args.model).detect
+
+    by_encoding = collections.defaultdict(list)
+    by_size = collections.defaultdict(list)
+    calls: List[Call] = []
+    for path, encoding in iter_fixtures():
+        content = path.read_bytes()
+        detect(content)  # Warm up caches
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            detect(content)
+            times.append(time.perf_counter() - start)
+        by_encoding[encoding.value].extend((t, len(content)) for t in times)
+        by_size[_get_bucket(len(content))].extend((t, len(content)) for t in times)
+        calls.append((max(times), path, content))
+
+    means = {
+        encoding: sum(elapsed for elapsed, _ in timings) / len(timings)
+        for encoding, timings in by_encoding.items()
+    }
+    encodings = sorted(means, key=means.__getitem__, reverse=True)
+    for line in _create_breakdown('Encoding', by_encoding, encodings).splitlines():
+        LOGGER.info(line)
+
+    LOGGER.info('')
+    buckets = [name for _, name in SIZE_BUCKETS if name in by_size]
+    for line in _create_breakdown('Input Size', by_size, buckets).splitlines():
+        LOGGER.info(line)
+
+    if args.slowest:
+        LOGGER.info('')
+        slowest = sorted(calls, key=lambda call: call[0], reverse=True)[: args.slowest]
+        _profile_slowest(detect, slowest, args.output)
+
+
+if __name__ == '__main__':
+    main()
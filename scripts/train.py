@@ -0,0 +1,73 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import argparse
+import logging
+import pathlib
+import sys
+import time
+
+from charamel import Encoding, Scoring
+from charamel.training import Parameters, train
+
+LOGGER = logging.getLogger('train')
+
+
+def _parse_args() -> argparse.Namespace:
+    defaults = Parameters()
+    parser = argparse.ArgumentParser(
+        description='Train encoding detection model on a corpus laid out as '
+        '<corpus>/<encoding>/<files> and save it in resource format'
+    )
+    parser.add_argument('corpus', type=pathlib.Path, help='Corpus directory')
+    parser.add_argument('output', type=pathlib.Path, help='Model resource directory')
+    parser.add_argument('--encodings', nargs='+', type=Encoding)
+    parser.add_argument(
+        '--scoring', type=Scoring, choices=list(Scoring), default=Scoring.PRESENCE
+    )
+    parser.add_argument('--l1', type=float, default=defaults.l1)
+    parser.add_argument('--epochs', type=int, default=defaults.epochs)
+    parser.add_argument('--learning-rate', type=float, default=defaults.learning_rate)
+    parser.add_argument('--decay', type=float, default=defaults.decay)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--min-count', type=int, default=defaults.min_count)
+    parser.add_argument('--workers', type=int)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Train model and save it in resource format
+    """
+    args = _parse_args()
+    logging.basicConfig(format='%(message)s', level=logging.INFO, stream=sys.stdout)
+
+    start = time.time()
+    model = train(
+        args.corpus,
+        encodings=args.encodings,
+        scoring=args.scoring,
+        parameters=Parameters(
+            l1=args.l1,
+            epochs=args.epochs,
+            learning_rate=args.learning_rate,
+            decay=args.decay,
+            seed=args.seed,
+            min_count=args.min_count,
+        ),
+        workers=args.workers,
+    )
+    model.save(args.output)
+    LOGGER.info(
+        'Trained model for %d encodings with %d features in %.1f seconds',
+        len(model.encodings),
+        len(model.features),
+        time.time() - start,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,40 @@
 from typing import Any
 
+import pytest
+
+from charamel import Detector, Model
+from tests.utils import BIASES, WEIGHTS, create_model
+
+
+def pytest_addoption(parser: Any):
+    """
+    Add option to record performance baselines instead of checking them
+    """
+    parser.addoption(
+        '--update-baselines',
+        action='store_true',
+        help='Record measurements of performance tests as their new baselines',
+    )
+
 
 def pytest_make_parametrize_id(val: Any, argname: str):
     """
     Format argument for `pytest.mark.parametrize` test item
     """
     return f'{argname}={val}'
+
+
+@pytest.fixture(name='model')
+def _get_model() -> Model:
+    """
+    Small model that tells UTF-8 from CP-1251 encoded Cyrillic
+    """
+    return create_model(weights=WEIGHTS, biases=BIASES)
+
+
+@pytest.fixture(name='detector')
+def _get_detector(model: Model) -> Detector:
+    """
+    Detector with the small model
+    """
+    return Detector.from_model(model, min_confidence=0.7)
@@ -0,0 +1,76 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import pytest
+
+from charamel import Detector, Encoding, Model
+from charamel.bounded import Budget, score_within
+from charamel.features import _get_features
+
+
+@pytest.mark.parametrize('scoring', ['presence', 'frequency'])
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_whole_content(model, scoring, chunk_size):
+    model = Model(model.features, model.weights, model.biases, scoring)
+    detector = Detector.from_model(model)
+    content = b'\xd0\xbf\xd0\xbf' + b'\xef\xf0' * 8
+    result = detector.probe_within(content, top=2, chunk_size=chunk_size)
+    assert not result.partial
+    assert result.processed == len(content)
+    assert result.encodings == [
+        (encoding, pytest.approx(confidence))
+        for encoding, confidence in detector.probe(content, top=2)
+    ]
+    assert detector.detect_within(content, chunk_size=chunk_size) == (
+        detector.detect(content),
+        False,
+        len(content),
+    )
+
+
+@pytest.mark.parametrize('max_bytes', [0, 1, 4, 5])
+def test_max_bytes(model, max_bytes):
+    detector = Detector.from_model(model)
+    content = b'\xd0\xbf\xd0\xbf' + b'\xef\xf0' * 8
+    result = detector.probe_within(content, max_bytes=max_bytes, chunk_size=2)
+    assert result.partial
+    assert result.processed == max_bytes
+    assert result.encodings == [
+        (encoding, pytest.approx(confidence))
+        for encoding, confidence in detector.probe(content[:max_bytes])
+    ]
+
+
+def test_timeout(model):
+    detector = Detector.from_model(model)
+    content = b'\xd0\xbf' * 1000
+    result = detector.detect_within(content, timeout=0.0, chunk_size=100)
+    assert result == (Encoding.UTF_8, True, 100)
+    assert detector.detect_within(content, timeout=60.0) == (
+        Encoding.UTF_8,
+        False,
+        len(content),
+    )
+
+
+@pytest.mark.parametrize(
+    ('budget', 'message'),
+    [
+        ({'max_bytes': -1}, 'max_bytes must be'),
+        ({'timeout': -0.1}, 'timeout must be'),
+        ({'chunk_size': 0}, 'chunk_size must be'),
+    ],
+)
+def test_errors(model, budget, message):
+    with pytest.raises(ValueError, match=message):
+        Detector.from_model(model).probe_within(b'content', **budget)
+
+
+def test_score_within(model):
+    content = b'\xd0\xbf\xd0\xbf\xef\xf0'
+    scores, partial, processed = score_within(model, content, Budget(max_bytes=4))
+    assert (partial, processed) == (True, 4)
+    assert scores == pytest.approx(model.score(_get_features(content[:4])))
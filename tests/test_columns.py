@@ -0,0 +1,70 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import math
+
+import pytest
+
+from charamel import Detector, Encoding
+from charamel.columns import detect_column
+
+UTF_8 = 'привет'.encode('utf_8')
+CP_1251 = 'привет'.encode('cp1251')
+CELLS = [UTF_8, None, CP_1251, UTF_8, b'', float('nan'), bytearray(CP_1251)]
+
+
+@pytest.mark.parametrize(('chunk_size', 'workers'), [(1, 1), (3, 1), (1024, 2)])
+def test_detect_column(detector, chunk_size, workers):
+    result = detect_column(detector, CELLS, chunk_size=chunk_size, workers=workers)
+    assert result.encodings == [
+        Encoding.UTF_8,
+        None,
+        Encoding.CP_1251,
+        Encoding.UTF_8,
+        None,
+        None,
+        Encoding.CP_1251,
+    ]
+    assert result.confidences[1] is None
+    assert result.confidences[4] == pytest.approx(1 / (1 + math.exp(-0.5)))
+    assert result.confidences[0] == detector.probe(UTF_8, top=1)[0][1]
+
+
+def test_detector_sent_once(detector, monkeypatch):
+    sent = []
+    reduce = Detector.__reduce__
+
+    def _reduce(self):
+        sent.append(self)
+        return reduce(self)
+
+    monkeypatch.setattr(Detector, '__reduce__', _reduce)
+    result = detect_column(detector, CELLS * 4, chunk_size=2, workers=2)
+    assert result == detect_column(detector, CELLS * 4)
+    assert len(sent) <= 1
+
+
+def test_chunk_size_error(detector):
+    with pytest.raises(ValueError, match='chunk_size must be positive'):
+        detect_column(detector, CELLS, chunk_size=0)
+
+
+@pytest.mark.parametrize('large', [False, True])
+def test_detect_arrow_column(detector, large):
+    pyarrow = pytest.importorskip('pyarrow')
+    cells = [UTF_8, None, CP_1251, b'', UTF_8] * 3
+    array = pyarrow.array(cells, pyarrow.large_binary() if large else pyarrow.binary())
+    chunked = pyarrow.chunked_array([array.slice(0, 4), array.slice(4)])
+    expected = detect_column(detector, cells)
+    assert detect_column(detector, array) == expected
+    assert detect_column(detector, chunked, chunk_size=3, workers=2) == expected
+    assert detect_column(detector, array.slice(3)) == detect_column(detector, cells[3:])
+
+
+def test_detect_arrow_strings(detector):
+    pyarrow = pytest.importorskip('pyarrow')
+    with pytest.raises(ValueError, match='Column must be binary'):
+        detect_column(detector, pyarrow.array(['text']))
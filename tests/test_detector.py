@@ -4,9 +4,14 @@
 
 Licensed under Apache 2.0
 """
+import array
+import math
+import pickle
+
 import pytest
 
-from charamel import Detector, Encoding
+from charamel import Detector, Encoding, Model
+from charamel.features import _get_feature_counts, _get_features
 from tests.fixtures import FIXTURE_DIRECTORY, iter_fixtures
 from tests.utils import is_correct_encoding, skip
 
@@ -173,3 +178,147 @@ def test_files(detector, path, encoding):
     expected = content.decode(encoding)
     encoding = detector.detect(content)
     assert is_correct_encoding(content, encoding, expected)
+
+
+def test_pickle_bundled(detector):
+    data = pickle.dumps(detector)
+    assert len(data) < 10_000
+    restored = pickle.loads(data)
+    assert restored.encodings == detector.encodings
+    assert restored.detect(b'\xc4\xe3\xba\xc3') is detector.detect(b'\xc4\xe3\xba\xc3')
+
+
+def test_pickle_embedded_model(model):
+    detector = Detector.from_model(model, min_confidence=0.3)
+    restored = pickle.loads(pickle.dumps(detector))
+    assert restored.encodings == detector.encodings
+    assert restored.probe(b'\xef\xf0') == detector.probe(b'\xef\xf0')
+
+
+def test_pickle_model_file(model, tmp_path):
+    path = tmp_path / 'model.bin'
+    model.dump(path)
+    detector = Detector.from_model(Model.open(path).select([Encoding.CP_1251]))
+    data = pickle.dumps(detector)
+    assert len(data) < 1_000
+    restored = pickle.loads(data)
+    assert restored.encodings == [Encoding.CP_1251]
+    assert restored.probe(b'\xef\xf0') == detector.probe(b'\xef\xf0')
+
+
+@pytest.mark.parametrize('top', [0, 1, 2, 3])
+@pytest.mark.parametrize('min_confidence', [0.0, 0.6, 0.9])
+def test_probe_ranking(model, top, min_confidence):
+    detector = Detector.from_model(model, min_confidence=min_confidence)
+    content = b'\xd0\xbf\xef'
+    scores = sorted(
+        model.score(_get_features(content)).items(), key=lambda x: x[1], reverse=True
+    )
+    expected = [
+        (encoding, confidence)
+        for encoding, confidence in (
+            (encoding, 1 / (1 + math.exp(-score))) for encoding, score in scores[:top]
+        )
+        if confidence >= min_confidence
+    ]
+    assert detector.probe(content, top=top) == expected
+
+
+def test_batch(model):
+    detector = Detector.from_model(model, min_confidence=0.7)
+    contents = [b'\xd0\xbf', b'\xef\xf0', b'', bytearray(b'\xd0')]
+    assert detector.detect_batch(contents) == [
+        detector.detect(content) for content in contents
+    ]
+    assert detector.probe_batch(contents, top=1) == [
+        detector.probe(content, top=1) for content in contents
+    ]
+
+
+@pytest.mark.parametrize(('window', 'step'), [(64, 16), (100, 1), (128, 128)])
+def test_segment(model, window, step):
+    detector = Detector.from_model(model)
+    first = 'привет, мир! '.encode('utf_8') * 20
+    second = 'привет, мир! '.encode('cp1251') * 20
+    segments = detector.segment(first + second, window=window, step=step)
+    assert [segment.encoding for segment in segments] == [
+        Encoding.UTF_8,
+        Encoding.CP_1251,
+    ]
+    assert segments[0].start == 0
+    assert segments[0].end == segments[1].start
+    assert abs(segments[0].end - len(first)) <= window
+    assert segments[1].end == len(first) + len(second)
+
+
+@pytest.mark.parametrize('content', [b'\xd0\xbf\xd0', b'\xef\xf0\xf0', b'\xd0\xef'])
+def test_segment_whole_content(model, content):
+    detector = Detector.from_model(model)
+    [segment] = detector.segment(content, window=len(content), step=1)
+    [(encoding, confidence)] = detector.probe(content, top=1)
+    assert segment == (0, len(content), encoding, pytest.approx(confidence))
+
+
+def test_segment_empty(model):
+    assert Detector.from_model(model).segment(b'') == []
+
+
+@pytest.mark.parametrize(
+    ('window', 'step', 'message'),
+    [(1, 1, 'window must be'), (10, 0, 'step must be'), (10, 11, 'step must be')],
+)
+def test_segment_errors(model, window, step, message):
+    with pytest.raises(ValueError, match=message):
+        Detector.from_model(model).segment(b'content', window=window, step=step)
+
+
+@pytest.mark.parametrize(
+    'content', [b'', b'\xd0', b'\xd0\xbf\xd0\xbf', b'\xef\xf0\xd0\xbf\xef']
+)
+def test_feature_counts(content):
+    pairs = [x * 256 + y for x, y in zip(content, content[1:])]
+    features = list(content) + pairs
+    total = max(len(features), 1)
+    assert _get_feature_counts(content) == {
+        feature: features.count(feature) / total for feature in set(features)
+    }
+
+
+def test_frequency_scoring(model):
+    frequency_model = Model(model.features, model.weights, model.biases, 'frequency')
+    detector = Detector.from_model(frequency_model)
+    content = b'\xd0\xbf' + b'\xef\xf0' * 8
+    assert Detector.from_model(model).detect(content) is Encoding.UTF_8
+    [segment] = detector.segment(content, window=len(content), step=1)
+    [(encoding, confidence)] = detector.probe(content, top=1)
+    assert encoding is Encoding.CP_1251
+    assert segment == (0, len(content), encoding, pytest.approx(confidence))
+
+
+@pytest.mark.parametrize(
+    'content', [b'', b'\xd0', b'\xd0\xbf\xd0\xbf', b'\xef\xf0\xd0\xbf\xef']
+)
+def test_features(content):
+    pairs = {x * 256 + y for x, y in zip(content, content[1:])}
+    assert _get_features(content) == set(content) | pairs
+
+
+@pytest.mark.parametrize(
+    'convert',
+    [
+        bytearray,
+        lambda content: memoryview(b'\x00\x00' + content + b'\x00')[2:-1],
+        lambda content: array.array('B', content),
+        lambda content: memoryview(bytes(x for b in content for x in (b, 0)))[::2],
+    ],
+)
+def test_buffer_content(model, convert):
+    detector = Detector.from_model(model)
+    content = b'\xd0\xbf\xd0\xbf' + b'\xef\xf0' * 8
+    buffer = convert(content)
+    assert detector.probe(buffer) == detector.probe(content)
+    assert detector.detect_batch([buffer]) == [detector.detect(content)]
+    assert detector.segment(buffer, window=4, step=2) == detector.segment(
+        content, window=4, step=2
+    )
+    assert _get_feature_counts(buffer) == _get_feature_counts(content)
@@ -0,0 +1,236 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import pickle
+
+import pytest
+
+from charamel import Detector, Encoding, Model, Scoring
+from charamel.features import _get_features
+from charamel.model import _MAPPED
+from tests.utils import create_model
+
+
+@pytest.fixture(name='model')
+def _get_model():
+    return create_model(
+        weights={
+            Encoding.UTF_8: {0xD0: 2.0, 0xD0BF: 1.5, 0x20: 0.0001},
+            Encoding.CP_1251: {0xEF: 2.0, 0xF0: 1.0, 0x20: -0.0001},
+            Encoding.KOI_8_R: {0xD2: 1.0, 0xF0: -1.0},
+        },
+        biases={Encoding.UTF_8: 0.5, Encoding.CP_1251: 0.0, Encoding.KOI_8_R: -0.5},
+    )
+
+
+def test_mismatched_encodings():
+    with pytest.raises(ValueError, match='must have the same encodings'):
+        Model(features={}, weights={Encoding.UTF_8: []}, biases={})
+
+
+@pytest.mark.parametrize(
+    ('encodings', 'threshold', 'expected'),
+    [
+        ([Encoding.UTF_8], 0.0, {0x20, 0xD0, 0xD0BF}),
+        ([Encoding.UTF_8], 0.001, {0xD0, 0xD0BF}),
+        ([Encoding.CP_1251, Encoding.KOI_8_R], 0.0, {0x20, 0xD2, 0xEF, 0xF0}),
+        ([Encoding.CP_1251, Encoding.KOI_8_R], 1.0, {0xEF}),
+    ],
+)
+def test_compile(model, encodings, threshold, expected):
+    compiled = model.compile(encodings, threshold=threshold)
+    assert compiled.encodings == encodings
+    assert set(compiled.features) == expected
+    assert sorted(compiled.features.values()) == list(range(len(expected)))
+    for encoding in encodings:
+        for feature, index in compiled.features.items():
+            original = model.weights[encoding][model.features[feature]]
+            assert compiled.weights[encoding][index] == original
+
+
+@pytest.mark.parametrize(
+    ('encodings', 'threshold', 'message'),
+    [
+        ([], 0.0, 'No encodings specified'),
+        ([Encoding.UTF_8], -1.0, 'threshold must be non-negative'),
+        ([Encoding.BIG_5], 0.0, 'not supported by model: big5'),
+    ],
+)
+def test_compile_errors(model, encodings, threshold, message):
+    with pytest.raises(ValueError, match=message):
+        model.compile(encodings, threshold=threshold)
+
+
+@pytest.mark.parametrize('text', ['привет', 'пора', 'тест'])
+def test_compiled_detection(model, text):
+    encodings = [Encoding.UTF_8, Encoding.CP_1251]
+    compiled = Detector.from_model(model.compile(encodings))
+    full = Detector.from_model(model)
+    for encoding in encodings:
+        content = text.encode(encoding)
+        expected = [probe for probe in full.probe(content) if probe[0] in encodings]
+        assert compiled.probe(content, top=2) == expected
+
+
+def test_save_and_load(model, tmp_path):
+    compiled = model.compile([Encoding.UTF_8, Encoding.CP_1251])
+    compiled.save(tmp_path)
+    loaded = Model.load(compiled.encodings, directory=tmp_path)
+    assert loaded.features == compiled.features
+    for encoding, weights in compiled.weights.items():
+        assert loaded.weights[encoding] == pytest.approx(weights, rel=1e-3)
+    assert loaded.biases == compiled.biases
+
+
+def test_load_saved_encodings(model, tmp_path):
+    compiled = model.compile([Encoding.CP_1251, Encoding.UTF_8])
+    compiled.save(tmp_path)
+    loaded = Model.load(directory=tmp_path)
+    assert loaded.encodings == compiled.encodings
+    assert Model.load([Encoding.UTF_8], directory=tmp_path).encodings == [
+        Encoding.UTF_8
+    ]
+
+
+def test_select(model):
+    selected = model.select([Encoding.KOI_8_R])
+    assert selected.encodings == [Encoding.KOI_8_R]
+    assert selected.features == model.features
+    assert selected.nonzeros == model.nonzeros
+    assert selected.weights[Encoding.KOI_8_R] == model.weights[Encoding.KOI_8_R]
+    assert selected.score({0xD2, 0xEF}) == {Encoding.KOI_8_R: 0.5}
+
+
+def test_sparse_weights(model):
+    assert model.nonzeros == 8
+    pruned = Model(model.features, model.weights, model.biases, threshold=0.001)
+    assert pruned.nonzeros == 6
+    assert pruned.features == model.features
+    assert pruned.weights[Encoding.UTF_8][model.features[0x20]] == 0.0
+    assert pruned.score({0xD0, 0xF0}) == pytest.approx(model.score({0xD0, 0xF0}))
+
+
+def test_load_threshold(model, tmp_path):
+    model.save(tmp_path)
+    assert Model.load(model.encodings, directory=tmp_path).source == tmp_path
+    pruned = Model.load(model.encodings, directory=tmp_path, threshold=0.001)
+    assert pruned.source is None
+    restored = pickle.loads(pickle.dumps(Detector.from_model(pruned)))
+    assert restored._model.nonzeros == 6  # pylint: disable=protected-access
+
+
+def test_selected_bytes(model):
+    selected = model.select([Encoding.KOI_8_R, Encoding.UTF_8])
+    restored = Model.from_bytes(selected.to_bytes())
+    assert restored.encodings == selected.encodings
+    assert restored.nonzeros == 5
+    for features in {0xD0, 0xD2}, {0xD0BF, 0xF0, 0x20}:
+        assert restored.score(features) == selected.score(features)
+
+
+def test_bytes(model):
+    restored = Model.from_bytes(model.to_bytes())
+    assert restored.encodings == model.encodings
+    assert restored.features == model.features
+    assert restored.biases == model.biases
+    for encoding, weights in model.weights.items():
+        assert list(restored.weights[encoding]) == list(weights)
+
+
+@pytest.mark.parametrize(
+    ('data', 'message'),
+    [
+        (b'', 'Not a serialized model'),
+        (b'JUNK' + bytes(12), 'Not a serialized model'),
+        (b'CHRM\xff' + bytes(11), 'Unsupported model format version'),
+    ],
+)
+def test_bytes_errors(data, message):
+    with pytest.raises(ValueError, match=message):
+        Model.from_bytes(data)
+
+
+def test_corrupted_bytes(model):
+    with pytest.raises(ValueError, match='corrupted'):
+        Model.from_bytes(model.to_bytes()[:-1])
+
+
+def test_dump_and_open(model, tmp_path):
+    path = tmp_path / 'model.bin'
+    model.dump(path)
+    opened = Model.open(path)
+    assert opened.source == path
+    assert opened is Model.open(path)
+    assert opened.score({0xD0, 0xEF}) == model.score({0xD0, 0xEF})
+
+
+def test_dump_over_open(model, tmp_path):
+    path = tmp_path / 'model.bin'
+    model.dump(path)
+    opened = Model.open(path)
+    expected = opened.score({0xD0, 0xEF})
+    model.select([Encoding.UTF_8]).dump(path)
+    assert opened.score({0xD0, 0xEF}) == expected
+    assert Model.open(path).encodings == [Encoding.UTF_8]
+    assert [key for key in _MAPPED if key.parent == path.parent.resolve()] == [
+        path.resolve()
+    ]
+    assert [child.name for child in tmp_path.iterdir()] == ['model.bin']
+
+
+def test_accumulator(model):
+    accumulator = model.accumulator()
+    assert accumulator.scores == model.biases
+    for feature in 0xD0, 0xD0, 0xEF, 0x41, 0xF0:
+        accumulator.add(feature)
+    accumulator.remove(0xD0)
+    accumulator.remove(0xF0)
+    assert accumulator.scores == pytest.approx(model.score({0xD0, 0xEF}))
+
+
+@pytest.mark.parametrize(
+    ('target', 'expected'),
+    [((0, 3), (2, 5)), ((2, 5), (2, 5)), ((1, 9), (2, 6)), ((4, 4), (4, 5))],
+)
+def test_slide(model, target, expected):
+    content = memoryview(b'\xd0\xbf\xd2\xef\xf0 ')
+    accumulator = model.accumulator()
+    assert accumulator.slide(content, (0, 0), (0, 3)) == (0, 3)
+    bounds = accumulator.slide(content, (0, 3), (2, 5))
+    assert accumulator.slide(content, bounds, target) == expected
+    assert accumulator.scores == pytest.approx(
+        model.score(_get_features(content[expected[0] : expected[1]]))
+    )
+
+
+@pytest.fixture(name='frequency_model')
+def _get_frequency_model(model):
+    return Model(model.features, model.weights, model.biases, Scoring.FREQUENCY)
+
+
+def test_score_frequencies(frequency_model):
+    scores = frequency_model.score_frequencies({0xD0: 0.5, 0xEF: 0.25, 0x41: 0.25})
+    assert scores == pytest.approx(
+        {Encoding.UTF_8: 1.5, Encoding.CP_1251: 0.5, Encoding.KOI_8_R: -0.5}
+    )
+
+
+def test_frequency_accumulator(frequency_model):
+    accumulator = frequency_model.accumulator()
+    for feature in 0xD0, 0xD0, 0xEF, 0x41, 0xF0:
+        accumulator.add(feature)
+    accumulator.remove(0xF0)
+    expected = frequency_model.score_frequencies({0xD0: 0.5, 0xEF: 0.25, 0x41: 0.25})
+    assert accumulator.scores == pytest.approx(expected)
+
+
+def test_frequency_serialization(frequency_model, tmp_path):
+    assert Model.from_bytes(frequency_model.to_bytes()).scoring is Scoring.FREQUENCY
+    frequency_model.save(tmp_path)
+    loaded = Model.load(frequency_model.encodings, directory=tmp_path)
+    assert loaded.scoring is Scoring.FREQUENCY
+    compiled = frequency_model.compile([Encoding.UTF_8])
+    assert compiled.scoring is Scoring.FREQUENCY
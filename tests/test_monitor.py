@@ -0,0 +1,74 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import threading
+
+import pytest
+
+from charamel import Encoding
+from charamel.monitor import Monitor
+
+
+def test_monitor():
+    monitor = Monitor(window=4, min_confidence=0.7, bins=4)
+    monitor.update([(Encoding.CP_1252, 0.3), (Encoding.UTF_8, 0.2)])
+    monitor.update([(Encoding.UTF_8, 0.9)])
+    monitor.update([(Encoding.UTF_8, 1.0)])
+    monitor.update([])
+    monitor.observe(Encoding.UTF_8, 0.6)
+    snapshot = monitor.snapshot()
+    assert snapshot.total == 4
+    assert snapshot.counts == {Encoding.UTF_8: 3, None: 1}
+    assert snapshot.shares == {Encoding.UTF_8: 0.75, None: 0.25}
+    assert snapshot.low_confidence == {Encoding.UTF_8: 1, None: 1}
+    assert snapshot.low_confidence_rate == 0.5
+    assert snapshot.histograms == {Encoding.UTF_8: [0, 0, 1, 2], None: [1, 0, 0, 0]}
+
+
+def test_empty_monitor():
+    snapshot = Monitor().snapshot()
+    assert snapshot.total == 0
+    assert snapshot.counts == snapshot.histograms == {}
+    assert snapshot.low_confidence_rate == 0.0
+
+
+def test_drift():
+    monitor = Monitor(window=4)
+    for encoding in Encoding.UTF_8, Encoding.UTF_8, Encoding.ASCII, Encoding.ASCII:
+        monitor.observe(encoding, 0.9)
+    reference = monitor.snapshot()
+    assert reference.drift(reference) == 0.0
+    monitor.observe(Encoding.CP_1252, 0.9)
+    monitor.observe(Encoding.CP_1252, 0.9)
+    assert monitor.snapshot().drift(reference) == pytest.approx(0.5)
+
+
+def test_concurrent_updates():
+    monitor = Monitor(window=1000)
+
+    def _update():
+        for _ in range(10000):
+            monitor.observe(Encoding.UTF_8, 0.9)
+
+    threads = [threading.Thread(target=_update) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert monitor.snapshot().counts == {Encoding.UTF_8: 1000}
+
+
+@pytest.mark.parametrize(
+    ('kwargs', 'message'),
+    [
+        ({'window': 0}, 'window must be positive'),
+        ({'bins': 0}, 'bins must be positive'),
+        ({'min_confidence': 1.5}, 'min_confidence must be in range'),
+    ],
+)
+def test_monitor_errors(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        Monitor(**kwargs)
@@ -0,0 +1,150 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import json
+import pathlib
+import subprocess
+import sys
+import timeit
+from typing import Any, Dict
+
+import pytest
+
+from charamel import Detector
+from tests.fixtures import FIXTURE_DIRECTORY
+
+BASELINE_PATH = pathlib.Path(__file__).parent / 'baselines.json'
+REPEAT = 5
+
+_CONSTRUCTION = '''
+import json, resource, sys, time
+import charamel
+
+scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # Bytes on macOS
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+detector = charamel.Detector()
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': seconds, 'rss_megabytes': (after - before) / scale}))
+'''
+
+pytestmark = pytest.mark.performance
+
+
+def _load_baselines() -> Dict[str, Any]:
+    return json.loads(BASELINE_PATH.read_text())
+
+
+def _run_calibration() -> None:
+    """
+    Fixed workload that exercises the same interpreter machinery as detection:
+    byte counting, set and dict operations and arithmetic in Python loops
+    """
+    content = bytes(range(256)) * 64
+    counts: Dict[int, int] = {}
+    for word in memoryview(content).cast('H'):
+        counts[word] = counts.get(word, 0) + 1
+    features = set(content).union(counts)
+    total = 0.0
+    for feature in sorted(features):
+        total += feature * 0.5
+    assert total
+
+
+class Baselines:
+    """
+    Performance baselines from `baselines.json`, that are either checked
+    or recorded with `pytest -m performance --update-baselines`
+
+    Timings, i.e. construction seconds and detection nanoseconds per byte,
+    are scaled by the speed of the current machine relative to the one that
+    recorded baselines, which is measured with a fixed calibration workload
+    """
+
+    def __init__(self, path: pathlib.Path, calibration: float, update: bool):
+        self._path = path
+        self._data = json.loads(path.read_text())
+        self._update = update
+        self._calibration = calibration
+        if update:
+            self._data['calibration'] = round(calibration, 7)
+
+    def require(self, group: str, name: str) -> None:
+        """
+        Fail test if baseline is not recorded yet, so that a missing baseline
+        is not mistaken for a passing check
+        """
+        missing = self._data['calibration'] is None or self._data[group][name] is None
+        if missing and not self._update:
+            pytest.fail(f'No baseline for {group} {name}, run `make baselines`')
+
+    def check(self, group: str, name: str, value: float, kind: str) -> None:
+        """
+        Check that measurement is within tolerance band of its baseline
+
+        Args:
+            group: Group of baselines, e.g. `detect`
+            name: Name of baseline in group
+            value: Measurement, timings in units of the current machine
+            kind: Kind of measurement, `time` or `memory`
+        """
+        if self._update:
+            self._data[group][name] = round(value, 4)
+            encoded = json.dumps(self._data, indent=2, sort_keys=True)
+            self._path.write_text(encoded + '\n')
+            return
+
+        self.require(group, name)
+        baseline = self._data[group][name]
+        if kind == 'time':
+            baseline *= self._calibration / self._data['calibration']
+        tolerance = self._data['tolerance'][kind]
+        assert value <= baseline * tolerance, (
+            f'{group} {name} regressed: {value:.4f} exceeds baseline {baseline:.4f} '
+            f'by more than {round(100 * (tolerance - 1))}%'
+        )
+
+
+@pytest.fixture(name='baselines', scope='module')
+def _get_baselines(request):
+    calibration = min(timeit.repeat(_run_calibration, repeat=REPEAT, number=10)) / 10
+    update = request.config.getoption('--update-baselines')
+    return Baselines(BASELINE_PATH, calibration, update)
+
+
+@pytest.fixture(name='detector', scope='module')
+def _get_detector():
+    return Detector()
+
+
+def test_construction(baselines):
+    pytest.importorskip('resource')
+    baselines.require('construction', 'seconds')
+    measurements = []
+    for _ in range(REPEAT):
+        output = subprocess.run(
+            [sys.executable, '-c', _CONSTRUCTION],
+            check=True,
+            stdout=subprocess.PIPE,
+            cwd=str(pathlib.Path(__file__).parent.parent),
+        ).stdout
+        measurements.append(json.loads(output))
+    seconds = min(measurement['seconds'] for measurement in measurements)
+    rss = min(measurement['rss_megabytes'] for measurement in measurements)
+    baselines.check('construction', 'seconds', seconds, 'time')
+    baselines.check('construction', 'rss_megabytes', rss, 'memory')
+
+
+@pytest.mark.parametrize('name', sorted(_load_baselines()['detect']))
+def test_detect(baselines, detector, name):
+    baselines.require('detect', name)
+    content = (FIXTURE_DIRECTORY / name).read_bytes()
+    detector.detect(content)  # Warm up caches
+    number = max(1, 1_000_000 // len(content))
+    timer = timeit.Timer(lambda: detector.detect(content))
+    seconds = min(timer.repeat(repeat=REPEAT, number=number)) / number
+    baselines.check('detect', name, 1e9 * seconds / len(content), 'time')
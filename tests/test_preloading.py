@@ -0,0 +1,71 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import gc
+import os
+import sys
+
+import pytest
+
+import charamel
+from charamel import Detector, Encoding
+from tests.utils import create_weighted_model
+
+ENCODINGS = [Encoding.UTF_8, Encoding.CP_1251]
+
+
+@pytest.fixture(name='path')
+def _get_path(tmp_path):
+    path = tmp_path / 'model'
+    create_weighted_model(2.0).save(path)
+    return path
+
+
+@pytest.fixture(name='unfreeze')
+def _unfreeze():
+    yield
+    if hasattr(gc, 'unfreeze'):
+        gc.unfreeze()
+
+
+def test_preload(path):
+    model = charamel.preload(ENCODINGS, source=path, freeze=False)
+    assert model.encodings == ENCODINGS
+    assert charamel.preload(ENCODINGS, source=path, freeze=False) is model
+    assert charamel.preload(ENCODINGS[:1], source=path, freeze=False) is not model
+
+
+def test_preload_prefilter(path):
+    model = charamel.preload(ENCODINGS, source=path, prefilter=True, freeze=False)
+    detector = Detector.from_model(model, prefilter=True)
+    assert detector.detect(b'\xef\xf0') is Encoding.CP_1251
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='gc.freeze requires 3.7+')
+@pytest.mark.usefixtures('unfreeze')
+def test_freeze(path):
+    charamel.preload(ENCODINGS, source=path)
+    assert gc.get_freeze_count() > 0
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires fork')
+def test_fork(path):
+    model = charamel.preload(ENCODINGS, source=path, freeze=False)
+    data = Detector.from_model(model).to_bytes()
+    reader, writer = os.pipe()
+    pid = os.fork()
+    if not pid:  # pragma: no cover
+        restored = Detector.from_bytes(data)
+        same = restored._model is model  # pylint: disable=protected-access
+        os.write(writer, b'1' if same else b'0')
+        os._exit(0)  # pylint: disable=protected-access
+    os.waitpid(pid, 0)
+    assert os.read(reader, 1) == b'1'
+
+
+def test_no_encodings():
+    with pytest.raises(ValueError, match='No encodings specified'):
+        charamel.preload([])
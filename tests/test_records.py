@@ -0,0 +1,105 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import pytest
+
+from charamel import Encoding
+from charamel.records import (
+    Summary,
+    detect_fields,
+    detect_records,
+    iter_records,
+    summarize,
+    summarize_fields,
+)
+
+UTF_8 = 'привет'.encode('utf_8')
+CP_1251 = 'привет'.encode('cp1251')
+
+
+@pytest.mark.parametrize(
+    ('content', 'delimiter', 'expected'),
+    [
+        (b'', b'\n', []),
+        (b'a', b'\n', [b'a']),
+        (b'a\n', b'\n', [b'a']),
+        (b'a\n\nb', b'\n', [b'a', b'', b'b']),
+        (b'a\r\nb\r\n', b'\r\n', [b'a', b'b']),
+    ],
+)
+def test_iter_records(content, delimiter, expected):
+    assert list(iter_records(content, delimiter)) == expected
+
+
+def test_empty_delimiter():
+    with pytest.raises(ValueError, match='Empty delimiter'):
+        list(iter_records(b'content', b''))
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 1024])
+def test_detect_records(detector, batch_size):
+    records = [UTF_8, CP_1251, b'hello', UTF_8, UTF_8]
+    content = b'\n'.join(records) + b'\n'
+    assert list(detect_records(detector, content, batch_size=batch_size)) == [
+        detector.detect(record) for record in records
+    ]
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_detect_fields(detector, batch_size):
+    content = b'\n'.join(
+        [b'\t'.join([UTF_8, CP_1251]), b'\t'.join([UTF_8, CP_1251, UTF_8])]
+    )
+    rows = list(
+        detect_fields(detector, content, separator=b'\t', batch_size=batch_size)
+    )
+    assert rows == [
+        [Encoding.UTF_8, Encoding.CP_1251],
+        [Encoding.UTF_8, Encoding.CP_1251, Encoding.UTF_8],
+    ]
+    assert [summary.encoding for summary in summarize_fields(rows)] == [
+        Encoding.UTF_8,
+        Encoding.CP_1251,
+        Encoding.UTF_8,
+    ]
+
+
+@pytest.mark.parametrize('batch_size', [0, -1])
+def test_incorrect_batch_size(detector, batch_size):
+    with pytest.raises(ValueError, match='batch_size must be positive'):
+        list(detect_records(detector, UTF_8, batch_size=batch_size))
+
+
+@pytest.mark.parametrize(
+    ('encodings', 'expected'),
+    [
+        ([], Summary(None, 0.0, {})),
+        ([None], Summary(None, 0.0, {None: 1})),
+        (
+            [Encoding.UTF_8, None, Encoding.UTF_8, Encoding.CP_1251],
+            Summary(
+                Encoding.UTF_8,
+                0.5,
+                {Encoding.UTF_8: 2, Encoding.CP_1251: 1, None: 1},
+            ),
+        ),
+    ],
+)
+def test_summarize(encodings, expected):
+    assert summarize(encodings) == expected
+
+
+@pytest.mark.parametrize(
+    'convert', [bytearray, lambda content: memoryview(b'#' + content + b'#')[1:-1]]
+)
+def test_buffer_content(detector, convert):
+    records = [UTF_8, CP_1251, UTF_8]
+    content = b'\n'.join(b','.join([record, record]) for record in records)
+    expected = [detector.detect(record) for record in records]
+    assert list(iter_records(convert(content))) == content.split(b'\n')
+    assert list(detect_records(detector, convert(content))) == expected
+    rows = detect_fields(detector, convert(content))
+    assert list(rows) == [[encoding, encoding] for encoding in expected]
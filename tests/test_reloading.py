@@ -0,0 +1,115 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import pytest
+
+from charamel import Detector, Encoding, Model, reloading
+from charamel.reloading import ModelReloader
+from charamel.resources import checksum_resources, compute_checksum, read_resources
+from tests.utils import create_weighted_model
+
+CONTENT = 'привет'.encode('utf_8')
+
+
+def test_swap_model():
+    old, new = create_weighted_model(2.0), create_weighted_model(-2.0)
+    detector = Detector.from_model(old)
+    assert detector.detect(CONTENT) is Encoding.UTF_8
+    assert detector.swap_model(new) is old
+    assert detector.detect(CONTENT) is Encoding.CP_1251
+
+
+@pytest.mark.parametrize('dump', [False, True])
+def test_reload(tmp_path, dump):
+    path = tmp_path / 'model.bin'
+    if dump:
+        create_weighted_model(-2.0).dump(path)
+    else:
+        path = tmp_path / 'model'
+        create_weighted_model(-2.0).save(path)
+
+    detector = Detector.from_model(create_weighted_model(2.0))
+    with ModelReloader(detector, checksum='initial') as reloader:
+        assert reloader.metrics.version.number == 0
+        assert reloader.metrics.version.checksum == 'initial'
+        version = reloader.reload(path, compute_checksum(path)).result()
+        assert version.number == 1
+        assert version.source == path
+        assert reloader.metrics.version == version
+        assert reloader.metrics.reloads == 1
+        assert detector.detect(CONTENT) is Encoding.CP_1251
+
+
+def test_reload_replaced_file(tmp_path):
+    path = tmp_path / 'model.bin'
+    create_weighted_model(2.0).dump(path)
+    old = Model.open(path)
+    detector = Detector.from_model(old)
+    data = detector.to_bytes()
+
+    create_weighted_model(-2.0).dump(path)
+    with ModelReloader(detector) as reloader:
+        reloader.reload(path, compute_checksum(path)).result()
+    assert detector.detect(CONTENT) is Encoding.CP_1251
+    assert Detector.from_bytes(data).detect(CONTENT) is Encoding.CP_1251
+    assert Detector.from_model(old).detect(CONTENT) is Encoding.UTF_8
+
+
+def test_reload_rewritten_directory(tmp_path):
+    create_weighted_model(2.0).save(tmp_path)
+    detector = Detector.from_model(Model.load(directory=tmp_path))
+    data = detector.to_bytes()
+    assert Detector.from_bytes(data).detect(CONTENT) is Encoding.UTF_8
+
+    create_weighted_model(-2.0).save(tmp_path)
+    with ModelReloader(detector) as reloader:
+        reloader.reload(tmp_path, compute_checksum(tmp_path)).result()
+    assert detector.detect(CONTENT) is Encoding.CP_1251
+    assert Detector.from_bytes(data).detect(CONTENT) is Encoding.CP_1251
+
+
+def test_reload_validated_contents(tmp_path, monkeypatch):
+    create_weighted_model(-2.0).save(tmp_path)
+    checksum = compute_checksum(tmp_path)
+
+    def _read_and_replace(directory):
+        resources = read_resources(directory)
+        create_weighted_model(2.0).save(directory)
+        return resources
+
+    monkeypatch.setattr(reloading, 'read_resources', _read_and_replace)
+    detector = Detector.from_model(create_weighted_model(2.0))
+    with ModelReloader(detector) as reloader:
+        reloader.reload(tmp_path, checksum).result()
+    assert detector.detect(CONTENT) is Encoding.CP_1251
+
+
+def test_reload_checksum_mismatch(tmp_path):
+    create_weighted_model(-2.0).save(tmp_path)
+    detector = Detector.from_model(create_weighted_model(2.0))
+    with ModelReloader(detector) as reloader:
+        with pytest.raises(ValueError, match='checksum mismatch'):
+            reloader.reload(tmp_path, 'bad').result()
+        metrics = reloader.metrics
+        assert metrics.version.number == 0
+        assert (metrics.reloads, metrics.failures) == (0, 1)
+        assert 'checksum mismatch' in metrics.last_error
+    assert detector.detect(CONTENT) is Encoding.UTF_8
+
+
+def test_checksum(tmp_path):
+    create_weighted_model(1.0).save(tmp_path)
+    checksum = compute_checksum(tmp_path)
+    assert checksum == compute_checksum(tmp_path)
+    assert checksum_resources(read_resources(tmp_path)) == checksum
+    create_weighted_model(1.5).save(tmp_path)
+    assert compute_checksum(tmp_path) != checksum
+
+
+def test_file_checksum(tmp_path):
+    path = tmp_path / 'model.bin'
+    create_weighted_model(1.0).dump(path)
+    assert checksum_resources({'.': path.read_bytes()}) == compute_checksum(path)
@@ -0,0 +1,69 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import concurrent.futures
+import os
+
+import pytest
+
+from tests.utils import create_weighted_model
+
+pytest.importorskip('multiprocessing.shared_memory')
+
+# pylint: disable=wrong-import-position
+from charamel.shared import ModelServer, attach  # noqa: E402
+
+CONTENT = b'\xd0\xbf\xd0\xbf'
+
+
+@pytest.fixture(name='name')
+def _get_name():
+    return f'charamel-test-{os.getpid()}'
+
+
+def _score(name):
+    shared = attach(name)
+    return shared.version, shared.model.score({0xD0})
+
+
+def test_publish_and_attach(name):
+    with ModelServer(name) as server:
+        with pytest.raises(ValueError, match='No model is published'):
+            attach(name)
+
+        first = create_weighted_model(2.0)
+        assert server.publish(first) == 1
+        shared = attach(name)
+        assert shared.version == 1
+        assert shared.model.score({0xD0}) == first.score({0xD0})
+        assert attach(name) is shared
+
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            scores = list(executor.map(_score, [name] * 2))
+        assert scores == [(1, first.score({0xD0}))] * 2
+
+        second = create_weighted_model(-2.0)
+        assert server.publish(second) == 2
+        assert server.version == 2
+        assert attach(name).model.score({0xD0}) == second.score({0xD0})
+        assert shared.model.score({0xD0}) == first.score({0xD0})
+
+
+def test_restarted_server(name):
+    with ModelServer(name) as server:
+        server.publish(create_weighted_model(1.0))
+        assert attach(name).version == 1
+    with ModelServer(name) as server:
+        model = create_weighted_model(3.0)
+        server.publish(model)
+        shared = attach(name)
+        assert shared.version == 1
+        assert shared.model.score({0xD0}) == model.score({0xD0})
+
+
+def test_missing_server():
+    with pytest.raises(FileNotFoundError):
+        attach('charamel-test-missing')
@@ -0,0 +1,78 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import pytest
+
+from charamel import Detector, Encoding, Model, Scoring, training
+from charamel.training import Parameters, iter_corpus, train
+
+TEXTS = [
+    'Съешь же ещё этих мягких французских булок, да выпей чаю',
+    'В чащах юга жил бы цитрус? Да, но фальшивый экземпляр!',
+    'Широкая электрификация южных губерний даст мощный толчок',
+    'Эх, чужак, общий съём цен шляп - вот юность моя',
+]
+ENCODINGS = [Encoding.UTF_8, Encoding.CP_1251, Encoding.KOI_8_R]
+
+
+@pytest.fixture(name='corpus')
+def _get_corpus(tmp_path):
+    for encoding in ENCODINGS:
+        directory = tmp_path / encoding.value
+        directory.mkdir()
+        for i, text in enumerate(TEXTS):
+            (directory / f'{i}.txt').write_bytes(text.encode(encoding))
+    (tmp_path / '__pycache__').mkdir()
+    (tmp_path / '__pycache__' / 'junk.pyc').write_bytes(b'junk')
+    return tmp_path
+
+
+def test_iter_corpus(corpus):
+    files = list(iter_corpus(corpus))
+    assert len(files) == len(ENCODINGS) * len(TEXTS)
+    assert {encoding for _, encoding in files} == set(ENCODINGS)
+
+
+@pytest.mark.parametrize('scoring', list(Scoring))
+@pytest.mark.parametrize('workers', [1, 2])
+def test_train(corpus, scoring, workers):
+    model = train(corpus, scoring=scoring, workers=workers)
+    assert set(model.encodings) == set(ENCODINGS)
+    assert model.scoring is scoring
+    detector = Detector.from_model(model)
+    for encoding in ENCODINGS:
+        for text in TEXTS:
+            assert detector.detect(text.encode(encoding)) is encoding
+
+
+def test_train_subset(corpus, tmp_path):
+    model = train(corpus, encodings=[Encoding.CP_1251], workers=1)
+    assert model.encodings == [Encoding.CP_1251]
+    model.save(tmp_path / 'model')
+    loaded = Model.load(model.encodings, directory=tmp_path / 'model')
+    assert loaded.features == model.features
+
+
+def test_l1_pruning(corpus):
+    dense = train(corpus, parameters=Parameters(l1=0.0), workers=1)
+    sparse = train(corpus, parameters=Parameters(l1=1e-2), workers=1)
+    assert 0 < len(sparse.features) < len(dense.features)
+
+
+def test_failed_fit(corpus, monkeypatch):
+    def _fail(task):
+        raise RuntimeError(f'Failed to fit {task[0].value}')
+
+    monkeypatch.setattr(training, '_fit', _fail)
+    with pytest.raises(RuntimeError, match='Failed to fit'):
+        train(corpus, workers=1)
+    # pylint: disable=protected-access
+    assert not training._SAMPLES and not training._LABELS
+
+
+def test_empty_corpus(tmp_path):
+    with pytest.raises(ValueError, match='No files found'):
+        train(tmp_path)
@@ -0,0 +1,115 @@
+"""
+🌏 Charamel: Truly Universal Encoding Detection in Python 🌎
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Licensed under Apache 2.0
+"""
+import pickle
+import random
+
+import pytest
+
+from charamel import Detector, Encoding
+from charamel.features import _get_features
+from charamel.validity import exclude_invalid, get_invalid_features
+from tests.utils import BIASES, WEIGHTS, create_model
+
+
+@pytest.fixture(name='model')
+def _get_model():
+    return create_model(
+        weights={Encoding.ASCII: {0x41: 0.1}, **WEIGHTS},
+        biases={Encoding.ASCII: 5.0, **BIASES},
+    )
+
+
+def test_single_byte():
+    assert get_invalid_features(Encoding.ASCII) == frozenset(range(0x80, 0x100))
+    assert get_invalid_features(Encoding.CP_1252) == {0x81, 0x8D, 0x8F, 0x90, 0x9D}
+    assert not get_invalid_features(Encoding.LATIN_1)
+
+
+def test_utf_8():
+    invalid = get_invalid_features(Encoding.UTF_8)
+    assert {0xC0, 0xC1, 0xF5, 0xFF} <= invalid
+    assert 0x80 not in invalid  # Continuation byte
+    assert 0xC341 in invalid  # Incomplete character
+    assert 0x4180 in invalid  # Continuation byte after complete character
+    assert 0xE080 in invalid  # Overlong encoding
+    assert not {0xC3A9, 0xE0A0, 0x80C3, 0x8041}.intersection(invalid)
+
+
+def test_double_byte():
+    invalid = get_invalid_features(Encoding.SHIFT_JIS)
+    assert 0xFD in invalid
+    assert 0x80 not in invalid  # Trail byte
+    assert 0x2080 in invalid  # Trail byte after complete character
+    assert 0x8180 not in invalid
+    assert 0x4081 not in invalid  # 0x40 is also a trail byte
+
+
+@pytest.mark.parametrize(
+    'encoding', [Encoding.ISO_2022_JP, Encoding.UTF_16, Encoding.UTF_16_LE]
+)
+def test_no_invalid_features(encoding):
+    assert not get_invalid_features(encoding)
+
+
+@pytest.mark.parametrize(
+    'encoding',
+    [
+        Encoding.ASCII,
+        Encoding.BIG_5,
+        Encoding.CP_1251,
+        Encoding.EUC_KR,
+        Encoding.GB_18030,
+        Encoding.SHIFT_JIS,
+        Encoding.UTF_8,
+    ],
+)
+def test_encoded_text(encoding):
+    characters = []
+    for code in range(0x3400):
+        try:
+            chr(code).encode(encoding)
+            characters.append(chr(code))
+        except UnicodeEncodeError:
+            pass
+    text = ''.join(characters) + ''.join(random.Random(0).choices(characters, k=5000))
+    features = _get_features(text.encode(encoding))
+    assert features.isdisjoint(get_invalid_features(encoding))
+
+
+def test_exclude_invalid():
+    scores = {Encoding.ASCII: 1.0, Encoding.UTF_8: 0.5, Encoding.CP_1252: 0.0}
+    assert exclude_invalid(scores, [0x41, 0xC3]) == {
+        Encoding.UTF_8: 0.5,
+        Encoding.CP_1252: 0.0,
+    }
+    assert exclude_invalid(scores, [0x41, 0xC341]) == {
+        Encoding.ASCII: 1.0,
+        Encoding.CP_1252: 0.0,
+    }
+    assert exclude_invalid(scores, [0x41]) == scores
+    assert exclude_invalid(scores, [0xC341, 0x81]) == scores  # Nothing decodes it
+
+
+@pytest.mark.parametrize('scoring', ['presence', 'frequency'])
+@pytest.mark.parametrize(
+    ('content', 'expected'),
+    [
+        (b'\xd0\xbf', Encoding.UTF_8),
+        (b'\xef\xf0', Encoding.CP_1251),
+        (b'A', Encoding.ASCII),
+    ],
+)
+def test_prefilter(model, scoring, content, expected):
+    model = type(model)(model.features, model.weights, model.biases, scoring)
+    assert Detector.from_model(model).detect(content) is Encoding.ASCII
+    detector = Detector.from_model(model, prefilter=True)
+    assert detector.detect(content) is expected
+    assert detector.detect_within(content, chunk_size=1).encoding is expected
+    assert [encoding for encoding, _ in detector.probe(content)] == [
+        encoding for encoding, _ in detector.probe_within(content).encodings
+    ]
+    assert pickle.loads(pickle.dumps(detector)).detect(content) is expected
@@ -5,11 +5,11 @@
 Licensed under Apache 2.0
 """
 import re
-from typing import Optional
+from typing import Dict, Optional
 
 import pytest
 
-from charamel import Encoding
+from charamel import Encoding, Model
 
 
 def normalize(text: str) -> str:
@@ -78,3 +78,53 @@ def skip(*values, reason: str = ''):
         Skipped test item
     """
     return pytest.param(*values, marks=pytest.mark.skip(reason=reason))
+
+
+# Weights of a small model that tells UTF-8 from CP-1251 encoded Cyrillic
+WEIGHTS = {
+    Encoding.UTF_8: {0xD0: 2.0, 0xD0BF: 1.5},
+    Encoding.CP_1251: {0xEF: 2.0, 0xF0: 1.0},
+}
+BIASES = {Encoding.UTF_8: 0.5, Encoding.CP_1251: 0.0}
+
+
+def create_model(
+    weights: Dict[Encoding, Dict[int, float]], biases: Dict[Encoding, float]
+) -> Model:
+    """
+    Create small linear model from sparse weights
+
+    Args:
+        weights: Mapping from encodings to mappings from features to weights
+        biases: Mapping from encodings to their biases
+
+    Returns:
+        Linear model over features that have weights for at least one encoding
+    """
+    features = sorted({feature for values in weights.values() for feature in values})
+    return Model(
+        features={feature: index for index, feature in enumerate(features)},
+        weights={
+            encoding: [values.get(feature, 0.0) for feature in features]
+            for encoding, values in weights.items()
+        },
+        biases=biases,
+    )
+
+
+def create_weighted_model(weight: float) -> Model:
+    """
+    Create model that prefers UTF-8 over CP-1251 for a single byte, so that models
+    with different weights detect different encodings
+
+    Args:
+        weight: Weight of byte 0xD0 for UTF-8, positive to detect UTF-8
+            and negative to detect CP-1251
+
+    Returns:
+        Linear model over two single-byte features
+    """
+    return create_model(
+        weights={Encoding.UTF_8: {0xD0: weight}, Encoding.CP_1251: {0xEF: 1.0}},
+        biases={Encoding.UTF_8: 0.0, Encoding.CP_1251: 0.0},
+    )